@@ -7,147 +7,333 @@
 """
 
 import os
-import yaml
+import copy
 import json
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Any, Optional
-from dotenv import load_dotenv
+
+try:
+    import orjson
+    _jloads = orjson.loads
+    _jdumps = orjson.dumps
+except ImportError:
+    _jloads = json.loads
+
+    def _jdumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+# 已解析YAML的进程级LRU缓存: path -> (mtime_ns, size, 解析结果)
+_YAML_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+_YAML_CACHE_MAX = 32
+_YAML_CACHE_LOCK = threading.Lock()
+
+# 固定的YAML配置结构: (配置键, 文件名)
+CONFIG_FILES = (
+    ('character', 'character_profile.yaml'),
+    ('emotion', 'emotion_config.yaml'),
+    ('memory', 'memory_rules.yaml'),
+    ('system', 'system_config.yaml'),
+)
+
+# 四个YAML合并解析结果的磁盘快照，命中时整体跳过PyYAML
+_SNAPSHOT_FILE = '.configs.cache'
+_SNAPSHOT_VERSION = 1
+
+# 系统级环境变量: (配置键, 环境变量名, 默认值)
+SYSTEM_DEFAULTS = (
+    ('name', 'SYSTEM_NAME', '星黎级AI女友'),
+    ('data_path', 'DATA_PATH', './data'),
+    ('log_level', 'LOG_LEVEL', 'INFO'),
+    ('language', 'LANGUAGE', 'zh-CN'),
+    ('timezone', 'TIMEZONE', 'Asia/Shanghai'),
+)
+
+# 启动必需的环境变量，以及示例文件中未替换的占位值前缀（可追加更多形式）
+_REQUIRED = ('TELEGRAM_BOT_TOKEN', 'DEEPSEEK_API_KEY', 'ZHIPU_API_KEY')
+_PLACEHOLDERS = ('你的_',)
+
+# .env.example 模板内容
+_EXAMPLE_ENV_BYTES = """# 星黎级AI女友 - 环境配置示例
+# 复制此文件为 .env 并填入真实值
+
+TELEGRAM_BOT_TOKEN=你的_Telegram_Bot_Token
+TELEGRAM_ADMIN_ID=你的_Telegram用户ID
+
+DEEPSEEK_API_KEY=你的_DeepSeek_API密钥
+DEEPSEEK_BASE_URL=https://api.deepseek.com
+DEEPSEEK_MODEL=deepseek-chat
+
+ZHIPU_API_KEY=你的_智谱AI_API密钥
+ZHIPU_BASE_URL=https://open.bigmodel.cn/api/paas/v4
+ZHIPU_MODEL=glm-4v
+""".encode('utf-8')
+
+# get() 路径查找中表示"不存在"的哨兵
+_MISSING = object()
+
+
+def load_env_file(env_path):
+    """解析 .env 文件并写入环境变量（已存在的变量不覆盖）
+    
+    只支持本项目用到的 KEY=VALUE 形式：忽略空行和 # 注释，去掉首尾引号。
+    """
+    with open(env_path, 'r', encoding='utf-8-sig') as f:
+        text = f.read()
+    
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        key, sep, value = line.partition('=')
+        if not sep:
+            continue
+        value = value.strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+            value = value[1:-1]
+        os.environ.setdefault(key.strip(), value)
+
+
+def _load_one(filepath, st: Optional[os.stat_result] = None) -> Any:
+    """加载单个YAML文件，文件未变化时直接返回缓存结果的副本"""
+    path = os.fspath(filepath)
+    if st is None:
+        st = os.stat(path)
+    
+    with _YAML_CACHE_LOCK:
+        cached = _YAML_CACHE.get(path)
+        if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            _YAML_CACHE.move_to_end(path)
+            return copy.deepcopy(cached[2])
+    
+    # 仅在快照失效时才导入PyYAML；优先使用libyaml的C实现加载器
+    import yaml
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    # 先整体读入bytes并关闭文件，再交给C解析器，跳过PyYAML的分块Reader；
+    # 缓存键取自实际读取的文件句柄，避免目录扫描与读取之间文件被改写
+    with open(path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        data = f.read()
+    parsed = yaml.load(data, Loader=loader)
+    
+    with _YAML_CACHE_LOCK:
+        _YAML_CACHE[path] = (st.st_mtime_ns, st.st_size, parsed)
+        _YAML_CACHE.move_to_end(path)
+        if len(_YAML_CACHE) > _YAML_CACHE_MAX:
+            _YAML_CACHE.popitem(last=False)
+    
+    return copy.deepcopy(parsed)
+
+
+def _load_snapshot(path: str, stamps: Dict[str, list]) -> Optional[Dict[str, Any]]:
+    """读取合并后的配置快照，仅当记录的各YAML文件 (mtime, size) 完全一致时有效"""
+    try:
+        with open(path, 'rb') as f:
+            snapshot = _jloads(f.read())
+    except (OSError, ValueError):
+        return None
+    
+    # 损坏或被手工改过的缓存可能是合法 JSON 但不是字典，此时回退到读取YAML
+    if not isinstance(snapshot, dict):
+        return None
+    if snapshot.get('version') != _SNAPSHOT_VERSION or snapshot.get('files') != stamps:
+        return None
+    return snapshot.get('configs')
+
+
+def _write_snapshot(path: str, stamps: Dict[str, list], configs: Dict[str, Any]):
+    """原子写入配置快照，无法无损表示或写入失败（如只读目录）时跳过"""
+    snapshot = {'version': _SNAPSHOT_VERSION, 'files': stamps, 'configs': configs}
+    tmp = None
+    try:
+        data = _jdumps(snapshot)
+        if _jloads(data) != snapshot:
+            return
+        # 临时文件名唯一，多个进程同时启动时不会互相覆盖
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.',
+                                   prefix=os.path.basename(path) + '.', suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except (OSError, TypeError, ValueError):
+        if tmp is not None:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+
+def _flatten(prefix: str, obj: Dict[str, Any], out: Dict[str, Any]):
+    """把嵌套配置展开为 {"a.b.c": value}，中间层字典同样保留以支持子树查询"""
+    for k, v in obj.items():
+        if not isinstance(k, str):
+            continue
+        path = prefix + k
+        out[path] = v
+        if isinstance(v, dict):
+            _flatten(path + '.', v, out)
+
 
 class ConfigManager:
     """配置管理器"""
     
     def __init__(self):
         self.project_root = Path(__file__).parent
+        # 预先解析为字符串路径，加载时直接交给 os.scandir/open
+        self.config_dir = os.fspath(self.project_root / "config")
+        self.logger = logging.getLogger("ConfigManager")
         self.configs = {}
         self.loaded = False
+        self._flat: Dict[str, Any] = {}
         
     def load_all_configs(self):
-        """加载所有配置文件"""
-        try:
-            # 1. 加载环境变量
-            self._load_environment()
-            
-            # 2. 加载角色配置文件
-            self._load_yaml_configs()
-            
-            # 3. 验证配置
-            self._validate_configs()
-            
-            self.loaded = True
-            return self.configs
-            
-        except Exception as e:
-            raise Exception(f"配置加载失败: {str(e)}")
+        """加载所有配置文件
+        
+        失败时直接抛出原始异常（FileNotFoundError/ValueError等），保留完整回溯
+        """
+        # 1. 加载环境变量
+        self._load_environment()
+        
+        # 2. 加载角色配置文件
+        self._load_yaml_configs()
+        
+        # 3. 验证配置
+        self._validate_configs()
+        
+        # 加载完成后配置不再变化，展开为扁平字典供 get() 直接查找
+        self._flat = {}
+        _flatten('', self.configs, self._flat)
+        self.loaded = True
+        return self.configs
     
     def _load_environment(self):
         """加载环境变量"""
         env_path = self.project_root / ".env"
         
         if env_path.exists():
-            load_dotenv(env_path)
+            load_env_file(env_path)
         else:
             # 创建示例环境文件
             self._create_example_env()
             raise FileNotFoundError(f"请配置 {env_path} 文件")
         
         # 收集所有环境变量
+        e = os.environ
         self.configs['env'] = {
             'telegram': {
-                'bot_token': os.getenv('TELEGRAM_BOT_TOKEN'),
-                'admin_id': os.getenv('TELEGRAM_ADMIN_ID')
+                'bot_token': e.get('TELEGRAM_BOT_TOKEN'),
+                'admin_id': e.get('TELEGRAM_ADMIN_ID')
             },
             'deepseek': {
-                'api_key': os.getenv('DEEPSEEK_API_KEY'),
-                'base_url': os.getenv('DEEPSEEK_BASE_URL'),
-                'model': os.getenv('DEEPSEEK_MODEL')
+                'api_key': e.get('DEEPSEEK_API_KEY'),
+                'base_url': e.get('DEEPSEEK_BASE_URL'),
+                'model': e.get('DEEPSEEK_MODEL')
             },
             'zhipu': {
-                'api_key': os.getenv('ZHIPU_API_KEY'),
-                'base_url': os.getenv('ZHIPU_BASE_URL'),
-                'model': os.getenv('ZHIPU_MODEL')
+                'api_key': e.get('ZHIPU_API_KEY'),
+                'base_url': e.get('ZHIPU_BASE_URL'),
+                'model': e.get('ZHIPU_MODEL')
             },
-            'system': {
-                'name': os.getenv('SYSTEM_NAME', '星黎级AI女友'),
-                'data_path': os.getenv('DATA_PATH', './data'),
-                'log_level': os.getenv('LOG_LEVEL', 'INFO'),
-                'language': os.getenv('LANGUAGE', 'zh-CN'),
-                'timezone': os.getenv('TIMEZONE', 'Asia/Shanghai')
-            }
+            'system': {k: e.get(env_k, d) for k, env_k, d in SYSTEM_DEFAULTS}
         }
     
     def _load_yaml_configs(self):
         """加载YAML配置文件"""
-        config_dir = self.project_root / "config"
-        
-        config_files = {
-            'character': 'character_profile.yaml',
-            'emotion': 'emotion_config.yaml',
-            'memory': 'memory_rules.yaml',
-            'system': 'system_config.yaml'
-        }
+        # 一次目录扫描取得所有文件条目，避免逐个 exists()/stat()
+        try:
+            with os.scandir(self.config_dir) as it:
+                entries = {entry.name: entry for entry in it}
+        except FileNotFoundError:
+            entries = {}
         
-        for key, filename in config_files.items():
-            filepath = config_dir / filename
-            if filepath.exists():
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    self.configs[key] = yaml.safe_load(f)
+        jobs = {}
+        for key, filename in CONFIG_FILES:
+            entry = entries.get(filename)
+            if entry is not None and entry.is_file():
+                jobs[key] = (entry.path, entry.stat())
             else:
                 self.logger.warning(f"配置文件缺失: {filename}")
                 self.configs[key] = {}
+        
+        if not jobs:
+            return
+        
+        snapshot_path = os.path.join(self.config_dir, _SNAPSHOT_FILE)
+        stamps = {key: [st.st_mtime_ns, st.st_size] for key, (_, st) in jobs.items()}
+        snapshot = _load_snapshot(snapshot_path, stamps)
+        if snapshot is not None:
+            self.configs.update(snapshot)
+            return
+        
+        # 各文件互相独立，并发读取和解析
+        with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+            results = dict(zip(jobs.keys(), executor.map(lambda job: _load_one(*job), jobs.values())))
+        self.configs.update(results)
+        _write_snapshot(snapshot_path, stamps, results)
     
     def _validate_configs(self):
         """验证配置完整性"""
-        env = self.configs['env']
-        
         # 检查必要配置
-        required_configs = [
-            ('TELEGRAM_BOT_TOKEN', env['telegram']['bot_token']),
-            ('DEEPSEEK_API_KEY', env['deepseek']['api_key']),
-            ('ZHIPU_API_KEY', env['zhipu']['api_key'])
-        ]
-        
-        missing = []
-        for name, value in required_configs:
-            if not value or value.startswith('你的_'):
-                missing.append(name)
+        environ = os.environ
+        missing = [name for name in _REQUIRED
+                   if not (value := environ.get(name)) or value.startswith(_PLACEHOLDERS)]
         
         if missing:
             raise ValueError(f"缺少必要配置: {', '.join(missing)}")
     
     def _create_example_env(self):
         """创建示例环境文件"""
-        example_content = """# 星黎级AI女友 - 环境配置示例
-# 复制此文件为 .env 并填入真实值
-
-TELEGRAM_BOT_TOKEN=你的_Telegram_Bot_Token
-TELEGRAM_ADMIN_ID=你的_Telegram用户ID
-
-DEEPSEEK_API_KEY=你的_DeepSeek_API密钥
-DEEPSEEK_BASE_URL=https://api.deepseek.com
-DEEPSEEK_MODEL=deepseek-chat
-
-ZHIPU_API_KEY=你的_智谱AI_API密钥
-ZHIPU_BASE_URL=https://open.bigmodel.cn/api/paas/v4
-ZHIPU_MODEL=glm-4v
-"""
+        example_path = os.path.join(os.fspath(self.project_root), ".env.example")
         
-        example_path = self.project_root / ".env.example"
-        with open(example_path, 'w', encoding='utf-8') as f:
-            f.write(example_content)
+        # O_EXCL 保证不覆盖已有文件；0o600 因为它常被直接复制为含密钥的 .env
+        try:
+            fd = os.open(example_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            return
+        try:
+            os.write(fd, _EXAMPLE_ENV_BYTES)
+        finally:
+            os.close(fd)
     
     def get(self, key: str, default: Any = None) -> Any:
         """获取配置值"""
-        keys = key.split('.')
-        value = self.configs
+        if self.loaded:
+            return self._flat.get(key, default)
         
+        value = self.configs
         try:
-            for k in keys:
+            for k in key.split('.'):
                 value = value[k]
-            return value
         except (KeyError, TypeError):
-            return default
+            value = _MISSING
+        
+        return default if value is _MISSING else value
     
     def save_config(self, key: str, value: Any, filename: str = None):
         """保存配置到文件"""
         # 待实现
-        pass
\ No newline at end of file
+        pass
+
+
+# 进程级共享的配置实例
+_INSTANCE: Optional[ConfigManager] = None
+_INSTANCE_LOCK = threading.Lock()
+
+
+def get_config() -> ConfigManager:
+    """获取已加载的全局配置管理器，首次调用时加载配置"""
+    global _INSTANCE
+    instance = _INSTANCE
+    if instance is not None and instance.loaded:
+        return instance
+    
+    with _INSTANCE_LOCK:
+        if _INSTANCE is None or not _INSTANCE.loaded:
+            instance = ConfigManager()
+            instance.load_all_configs()
+            _INSTANCE = instance
+        return _INSTANCE
\ No newline at end of file
@@ -8,18 +8,169 @@
 
 import json
 import base64
+import contextlib
+import functools
+import inspect
+import itertools
+import os
 import mimetypes
 import random
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, AsyncIterator, Optional, Tuple
 import logging
 import asyncio
-import requests
+import httpx
 from pathlib import Path
 
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+
+    def _json_bytes(obj: Any, indent: bool = False) -> bytes:
+        """序列化为UTF-8 JSON字节"""
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, option=option)
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_bytes(obj: Any, indent: bool = False) -> bytes:
+        """序列化为UTF-8 JSON字节"""
+        return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode('utf-8')
+
+# 共享HTTP连接池参数：复用TCP/TLS连接，避免每次请求重新握手
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100, keepalive_expiry=30.0)
+HTTP_TIMEOUT = httpx.Timeout(60.0)
+
+# 外部API重试参数：429/5xx及连接错误按指数退避（全抖动）重试
+API_MAX_ATTEMPTS = 5
+API_BACKOFF_BASE = 1.0
+API_BACKOFF_MAX = 30.0
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# 流式响应时，缓冲区达到该长度后在最近的句末处切出一段发送
+STREAM_SEGMENT_LENGTH = 100
+
+# 分块编码的块大小，必须是3的倍数，保证各段base64可以直接拼接
+_B64_CHUNK_SIZE = 57 * 1149
+
+
+# 整句精确匹配的问候语
+EXACT_GREETINGS = frozenset({'你好', '嗨', 'hello', 'hi', '在吗', '早', '早安', '晚安'})
+
+# 状态查询命令前缀
+STATUS_COMMANDS = ('/状态', '/status', '/info')
+
+# 固定回复候选（模块级元组，避免每次调用重建列表）
+GREETING_TEMPLATES = (
+    "{greeting}~ {emoji}",
+    "{greeting}，想我了没？{emoji}",
+    "{greeting}，今天过得怎么样？{emoji}"
+)
+FAREWELLS_NIGHT = (
+    "晚安啦，做个好梦~ 🌙",
+    "早点休息哦，明天见！💤",
+    "晚安，梦里见~ ✨"
+)
+FAREWELLS_DAY = (
+    "再见啦，记得想我哦~ 😊",
+    "拜拜，下次聊！👋",
+    "走啦，我会想你的~ 💕"
+)
+THANK_RESPONSES = (
+    "不客气啦~ 能帮到你就好 😊",
+    "跟我还客气什么呀~ 💕",
+    "你开心我就开心啦~ 😄"
+)
+CONCERN_RESPONSES_GOOD = (
+    "我很好呀~ 今天心情不错呢 😊",
+    "挺好的，就是有点想你啦~ 💕",
+    "还不错哦，你在关心我吗？好开心~ 🌟"
+)
+CONCERN_RESPONSES_LOW = (
+    "还好啦，就是有点累 😔",
+    "一般般，不过跟你聊天就开心了~ 😊",
+    "有点小情绪，不过看到你就好多了 💖"
+)
+STICKER_RESPONSES = (
+    "收到表情包啦~ 😊",
+    "这个表情好可爱！💕",
+    "嘻嘻，我也回你一个~ 😄",
+    "表情包大战开始！🤣"
+)
+# (模板, 图片描述截取长度)
+IMAGE_RESPONSE_TEMPLATES = (
+    ("哇！看到你发的图片了~ {}... 好有意思呀！😊", 50),
+    ("这张图片好特别呢！{}... 让我想起了我们上次的聊天~ 💕", 40),
+    ("图片收到啦~ {}... 你拍的吗？技术不错哦！📷", 30)
+)
+ERROR_RESPONSES = (
+    "哎呀，我现在有点小迷糊，没理解你的意思呢~能再说一次吗？😅",
+    "好像出了点小问题...不过没关系，我还在呢！💕",
+    "嗯...我的小脑袋有点转不过来，能换种方式说吗？🤔"
+)
+
+# 特殊文本关键词，按匹配优先级排列
+SPECIAL_TEXT_KEYWORDS = (
+    ('greeting', ('早上好', '下午好', '晚上好', 'good morning', 'good afternoon', 'good evening')),
+    ('farewell', ('再见', '拜拜', 'goodbye', 'bye')),
+    ('thanks', ('谢谢', '感谢', 'thank you', 'thanks')),
+    ('concern', ('你怎么样', '你好吗', 'how are you', '最近好吗')),
+)
+
+# 所有关键词合并为一个带命名分组的模式，一次扫描即可得到命中的类别
+_SPECIAL_TEXT_RE = re.compile('|'.join(
+    f"(?P<{category}>{'|'.join(map(re.escape, keywords))})"
+    for category, keywords in SPECIAL_TEXT_KEYWORDS
+))
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    """把 time.time() 时间戳格式化为ISO字符串（只在保存和对外读取时调用）"""
+    return None if ts is None else datetime.fromtimestamp(ts).isoformat()
+
+
+@functools.lru_cache(maxsize=32)
+def _guess_image_mime(suffix: str) -> str:
+    """按扩展名猜测图片MIME类型（结果缓存）"""
+    mime_type, _ = mimetypes.guess_type("image" + suffix)
+    return mime_type or "image/jpeg"
+
+
+class _RateLimiter:
+    """令牌桶限流器：按每分钟请求数补充令牌，允许少量突发"""
+    
+    def __init__(self, rpm: int, burst: Optional[int] = None):
+        self.rate = rpm / 60.0
+        self.capacity = float(burst or max(1, rpm // 6))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+    
+    async def acquire(self) -> float:
+        """取得一个令牌，返回为此等待的秒数"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # 先扣减再等待：令牌不足时为后来者预留未来的额度
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        wait = -self.tokens / self.rate
+        await asyncio.sleep(wait)
+        return wait
+
 class CommunicationHub:
     """通信中枢 - 处理所有AI模型通信和消息路由"""
     
+    # 句子切分（保留中文句末标点）与分段提示词
+    _SENT_SPLIT = re.compile('([。！？])')
+    _SENT_ENDS = '。！？'
+    _SEG_INDICATORS = re.compile('首先|其次|另外|而且|同时|最后')
+    
     def __init__(self, config_manager):
         """
         初始化通信中枢
@@ -33,28 +184,54 @@ class CommunicationHub:
         # 获取API配置
         self.api_config = self._load_api_config()
         
-        # 消息队列
-        self.message_queue = []
+        # HTTP客户端（按事件循环懒创建，见 _get_http）
+        self._http: Optional[httpx.AsyncClient] = None
+        self._http_loop = None
+        # 每个服务商的令牌桶（跨事件循环保留）和并发信号量（绑定事件循环，随HTTP客户端重建）
+        self._rate_limiters: Dict[str, _RateLimiter] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        
+        # 消息队列：按消息ID排列，先进先出，可按ID直接删除
         self.max_queue_size = 100
+        self.message_queue: OrderedDict = OrderedDict()
+        self._message_ids = itertools.count(1)
         
-        # 对话历史
-        self.conversation_history = {}
+        # 对话历史：每个用户一个定长deque，超出长度自动丢弃最旧的记录
         self.max_history_length = 20
+        self.conversation_history: Dict[str, deque] = defaultdict(
+            lambda: deque(maxlen=self.max_history_length)
+        )
         
         # 消息处理器
         self.message_handlers = self._initialize_handlers()
+        self.special_text_responders = {
+            'greeting': self._generate_greeting_response,
+            'farewell': self._generate_farewell_response,
+            'thanks': self._generate_thank_response,
+            'concern': self._generate_concern_response
+        }
+        
+        # 状态保存：同步与异步保存共用一把锁，避免并发写同一文件
+        self._save_lock = threading.Lock()
+        self._autosave_task: Optional[asyncio.Task] = None
         
-        # 响应缓存（避免重复处理）
-        self.response_cache = {}
+        # 人格引擎提供的系统提示词（首次使用时获取）
+        self._system_prompt: Optional[str] = None
+        
+        # 响应缓存（避免重复处理），按最近使用顺序排列
+        self.response_cache: OrderedDict = OrderedDict()
         self.cache_ttl = 300  # 5分钟
+        self.max_cache_size = 50
         
-        # 统计信息
+        # 统计信息（last_request_time 为 time.time() 时间戳）
         self.stats = {
             'total_messages': 0,
             'text_messages': 0,
             'image_messages': 0,
             'voice_messages': 0,
             'failed_requests': 0,
+            'throttled': 0,  # 本地限流等待或服务端返回429的次数
+            'retries': 0,
             'last_request_time': None
         }
         
@@ -63,23 +240,46 @@ class CommunicationHub:
     def _load_api_config(self) -> Dict[str, Any]:
         """加载API配置"""
         env_config = self.config.get('env', {})
+        deepseek_env = env_config.get('deepseek', {})
+        zhipu_env = env_config.get('zhipu', {})
         
-        return {
+        api_config = {
             'deepseek': {
-                'api_key': env_config.get('deepseek', {}).get('api_key'),
-                'base_url': env_config.get('deepseek', {}).get('base_url', 'https://api.deepseek.com'),
-                'model': env_config.get('deepseek', {}).get('model', 'deepseek-chat'),
+                'api_key': deepseek_env.get('api_key'),
+                'base_url': deepseek_env.get('base_url') or 'https://api.deepseek.com',
+                'model': deepseek_env.get('model') or 'deepseek-chat',
                 'max_tokens': 2000,
-                'temperature': 0.7
+                'temperature': 0.7,
+                'max_concurrency': 16,
+                'rpm': 60
             },
             'zhipu': {
-                'api_key': env_config.get('zhipu', {}).get('api_key'),
-                'base_url': env_config.get('zhipu', {}).get('base_url', 'https://open.bigmodel.cn/api/paas/v4'),
-                'model': env_config.get('zhipu', {}).get('model', 'glm-4v'),
+                'api_key': zhipu_env.get('api_key'),
+                'base_url': zhipu_env.get('base_url') or 'https://open.bigmodel.cn/api/paas/v4',
+                'model': zhipu_env.get('model') or 'glm-4v',
                 'max_tokens': 1000,
-                'temperature': 0.8
+                'temperature': 0.8,
+                'max_concurrency': 4,
+                'rpm': 30
             }
         }
+        
+        # 请求地址和请求头只在加载时构建一次，密钥也只在这里校验
+        for provider_config in api_config.values():
+            api_key = provider_config['api_key']
+            provider_config['key_valid'] = bool(api_key) and not api_key.startswith('你的_')
+            provider_config['completions_url'] = f"{provider_config['base_url']}/chat/completions"
+            provider_config['headers'] = {
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
+                "Accept": "application/json"
+            }
+            provider_config['stream_headers'] = {
+                **provider_config['headers'],
+                "Accept": "text/event-stream"
+            }
+        
+        return api_config
     
     def _initialize_handlers(self) -> Dict[str, Any]:
         """初始化消息处理器"""
@@ -92,7 +292,93 @@ class CommunicationHub:
             'document': self._handle_document_message
         }
     
-    def generate_response(self, context: Dict[str, Any]) -> Any:
+    def _get_http(self) -> httpx.AsyncClient:
+        """获取当前事件循环的共享HTTP客户端"""
+        loop = asyncio.get_running_loop()
+        if self._http is not None and self._http_loop is not loop and not self._http.is_closed:
+            # 事件循环变化：旧客户端的连接属于旧循环，需在旧循环中关闭
+            self._close_http_on_loop(self._http, self._http_loop)
+            self._http = None
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+            self._http_loop = loop
+            self._semaphores = {}
+        return self._http
+    
+    def _close_http_on_loop(self, client: httpx.AsyncClient, loop: asyncio.AbstractEventLoop):
+        """在客户端所属的事件循环中关闭它，释放连接池"""
+        if loop.is_closed():
+            self.logger.warning("旧事件循环已关闭，无法关闭其HTTP客户端，请在退出事件循环前调用 aclose()")
+        elif loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        else:
+            threading.Thread(target=loop.run_until_complete, args=(client.aclose(),),
+                             name="http-close", daemon=True).start()
+    
+    def _get_throttle(self, provider: str) -> Tuple[asyncio.Semaphore, _RateLimiter]:
+        """获取服务商的并发信号量和令牌桶"""
+        semaphore = self._semaphores.get(provider)
+        limiter = self._rate_limiters.get(provider)
+        if semaphore is None or limiter is None:
+            api_config = self.api_config[provider]
+            if semaphore is None:
+                semaphore = self._semaphores[provider] = asyncio.Semaphore(api_config['max_concurrency'])
+            if limiter is None:
+                limiter = self._rate_limiters[provider] = _RateLimiter(api_config['rpm'])
+        return semaphore, limiter
+    
+    async def _post_json(self, provider: str, url: str, headers: Dict[str, str],
+                         payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """限流发送JSON请求，429/5xx和连接错误按指数退避重试"""
+        client = self._get_http()
+        semaphore, limiter = self._get_throttle(provider)
+        body = _json_bytes(payload)
+        
+        for attempt in range(1, API_MAX_ATTEMPTS + 1):
+            retry_after = None
+            async with semaphore:
+                if await limiter.acquire():
+                    self.stats['throttled'] += 1
+                try:
+                    response = await client.post(url, headers=headers, content=body, timeout=timeout)
+                except httpx.TransportError as e:
+                    if attempt == API_MAX_ATTEMPTS:
+                        raise
+                    reason = repr(e)
+                else:
+                    if response.status_code not in RETRY_STATUS_CODES or attempt == API_MAX_ATTEMPTS:
+                        response.raise_for_status()
+                        return response.json()
+                    if response.status_code == 429:
+                        self.stats['throttled'] += 1
+                        try:
+                            retry_after = float(response.headers.get('Retry-After', ''))
+                        except ValueError:
+                            pass
+                        else:
+                            # 不信任服务端给出的等待时间：忽略负值，上限为 API_BACKOFF_MAX
+                            retry_after = min(retry_after, API_BACKOFF_MAX) if retry_after >= 0 else None
+                    reason = f"HTTP {response.status_code}"
+            
+            # 退避等待放在信号量之外，不占用并发名额
+            delay = retry_after if retry_after is not None else random.uniform(
+                0, min(API_BACKOFF_MAX, API_BACKOFF_BASE * 2 ** attempt))
+            self.stats['retries'] += 1
+            self.logger.warning(f"{provider} 请求失败（{reason}），{delay:.1f}秒后第{attempt}次重试")
+            await asyncio.sleep(delay)
+    
+    async def aclose(self):
+        """停止定期保存，保存最终状态并关闭HTTP连接池"""
+        if self._autosave_task is not None:
+            self._autosave_task.cancel()
+            self._autosave_task = None
+            await self.save_state_async()
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+        self._http = None
+        self._http_loop = None
+    
+    async def generate_response(self, context: Dict[str, Any]) -> Any:
         """生成响应（主入口）"""
         try:
             message_type = context.get('message_type', 'text')
@@ -104,6 +390,9 @@ class CommunicationHub:
             self.stats[f'{message_type}_messages'] = self.stats.get(f'{message_type}_messages', 0) + 1
             
             # 检查响应缓存
+            # 缓存目前关闭：同一句话得到一模一样的回复会显得很机械。
+            # 即使重新启用，也只做精确匹配，不做基于向量的近似匹配——
+            # 把意思相近的新消息当成旧消息回复，比多一次模型调用代价更大。
             #cache_key = self._generate_cache_key(user_id, user_message, message_type)
             #cached_response = self._get_cached_response(cache_key)
             
@@ -120,6 +409,8 @@ class CommunicationHub:
             
             # 处理消息
             response = handler(context)
+            if inspect.isawaitable(response):
+                response = await response
             
             # 缓存响应
             #self._cache_response(cache_key, response)
@@ -128,7 +419,7 @@ class CommunicationHub:
             self._update_conversation_history(user_id, user_message, response, context)
             
             # 更新最后请求时间
-            self.stats['last_request_time'] = datetime.now().isoformat()
+            self.stats['last_request_time'] = time.time()
             
             return response
             
@@ -137,7 +428,73 @@ class CommunicationHub:
             self.stats['failed_requests'] += 1
             return self._generate_error_response(context, str(e))
     
-    def _handle_text_message(self, context: Dict[str, Any]) -> str:
+    async def stream_response(self, context: Dict[str, Any]) -> AsyncIterator[str]:
+        """流式生成响应，按句子边界逐段产出
+        
+        文本消息以流式调用模型，首段在模型生成完毕前即可发出；
+        其他消息类型和特殊文本直接产出完整回复的各段。
+        """
+        if context.get('message_type', 'text') != 'text':
+            response = await self.generate_response(context)
+            if isinstance(response, dict) and response.get('segmented'):
+                for segment in response.get('segments', []):
+                    yield segment
+            else:
+                yield str(response)
+            return
+        
+        user_message = context.get('message', '')
+        user_id = context.get('user_id', 'default')
+        self.stats['total_messages'] += 1
+        self.stats['text_messages'] += 1
+        
+        special_response = self._check_special_text_cases(user_message, context)
+        if special_response:
+            self._update_conversation_history(user_id, user_message, special_response, context)
+            yield special_response
+            return
+        
+        messages = self._build_conversation_messages(context)
+        pieces = []
+        buffer = ""
+        try:
+            async with contextlib.aclosing(self._stream_deepseek_api(messages, context)) as deltas:
+                async for delta in deltas:
+                    pieces.append(delta)
+                    buffer += delta
+                    if len(buffer) >= STREAM_SEGMENT_LENGTH:
+                        cut = max(map(buffer.rfind, self._SENT_ENDS)) + 1
+                        if cut:
+                            segment, buffer = buffer[:cut].strip(), buffer[cut:]
+                            if segment:
+                                for part in self._iter_formatted_segments(segment, context):
+                                    yield part
+        except Exception as e:
+            self.logger.error(f"DeepSeek流式响应失败: {e}")
+            if pieces:
+                # 已经发出部分内容，不再重试，把收到的剩余部分发完
+                self.stats['failed_requests'] += 1
+            else:
+                # 还没有任何输出，退回到带重试的非流式调用
+                try:
+                    response_text = await self._call_deepseek_api(messages, context)
+                except Exception as e:
+                    self.stats['failed_requests'] += 1
+                    yield self._generate_error_response(context, str(e))
+                    return
+                pieces = [response_text]
+                buffer = ""
+                for segment in self._iter_formatted_segments(response_text, context):
+                    yield segment
+        
+        if buffer.strip():
+            for segment in self._iter_formatted_segments(buffer.strip(), context):
+                yield segment
+        
+        self._update_conversation_history(user_id, user_message, "".join(pieces), context)
+        self.stats['last_request_time'] = time.time()
+    
+    async def _handle_text_message(self, context: Dict[str, Any]) -> str:
         """处理文本消息"""
         user_message = context.get('message', '')
         current_state = context.get('current_state', {})
@@ -152,14 +509,14 @@ class CommunicationHub:
         messages = self._build_conversation_messages(context)
         
         # 调用DeepSeek API
-        response_text = self._call_deepseek_api(messages, context)
+        response_text = await self._call_deepseek_api(messages, context)
         
         # 格式化响应
         formatted_response = self._format_text_response(response_text, context)
         
         return formatted_response
     
-    def _handle_image_message(self, context: Dict[str, Any]) -> str:
+    async def _handle_image_message(self, context: Dict[str, Any]) -> str:
         """处理图片消息"""
         attachments = context.get('attachments', [])
         user_message = context.get('message', '')
@@ -175,7 +532,7 @@ class CommunicationHub:
         
         try:
             # 调用智谱AI图片理解
-            image_description = self._call_zhipu_vision_api(image_path, user_message)
+            image_description = await self._call_zhipu_vision_api(image_path, user_message)
             
             # 生成情感化图片回复
             response = self._generate_image_response(image_description, user_message, context)
@@ -193,17 +550,10 @@ class CommunicationHub:
     
     def _handle_sticker_message(self, context: Dict[str, Any]) -> str:
         """处理表情包消息"""
-        stickers = [
-            "收到表情包啦~ 😊",
-            "这个表情好可爱！💕",
-            "嘻嘻，我也回你一个~ 😄",
-            "表情包大战开始！🤣"
-        ]
-        
         # 根据心情选择回复
         mood = context.get('current_state', {}).get('mood', {})
         if mood.get('happiness', 50) > 70:
-            return random.choice(stickers)
+            return random.choice(STICKER_RESPONSES)
         else:
             return "看到你的表情包，心情好了一些呢~ 😌"
     
@@ -220,32 +570,18 @@ class CommunicationHub:
         message_lower = message.lower().strip()
         
         # 精确匹配的问候语
-        exact_greetings = ['你好', '嗨', 'hello', 'hi', '在吗', '早', '早安', '晚安']
-        if message_lower in exact_greetings:
-            return self._generate_greeting_response(context)
-        
-        # 时间相关问候
-        time_greetings = ['早上好', '下午好', '晚上好', 'good morning', 'good afternoon', 'good evening']
-        if any(greeting in message_lower for greeting in time_greetings):
+        if message_lower in EXACT_GREETINGS:
             return self._generate_greeting_response(context)
         
-        # 告别语
-        farewells = ['再见', '拜拜', 'goodbye', 'bye']
-        if any(farewell in message_lower for farewell in farewells):
-            return self._generate_farewell_response(context)
-        
-        # 感谢
-        thanks = ['谢谢', '感谢', 'thank you', 'thanks']
-        if any(thank in message_lower for thank in thanks):
-            return self._generate_thank_response(context)
-        
-        # 关心
-        concerns = ['你怎么样', '你好吗', 'how are you', '最近好吗']
-        if any(concern in message_lower for concern in concerns):
-            return self._generate_concern_response(context)
+        # 时间问候/告别/感谢/关心：一次扫描，按优先级选取命中的类别
+        matched = {m.lastgroup for m in _SPECIAL_TEXT_RE.finditer(message_lower)}
+        if matched:
+            for category, _ in SPECIAL_TEXT_KEYWORDS:
+                if category in matched:
+                    return self.special_text_responders[category](context)
         
         # 命令/查询
-        if message_lower.startswith(('/状态', '/status', '/info')):
+        if message_lower.startswith(STATUS_COMMANDS):
             return self._generate_status_response(context)
         
         return None
@@ -270,60 +606,26 @@ class CommunicationHub:
             time_greeting = "这么晚还没睡呀"
             emoji = "✨"
         
-        variations = [
-            f"{time_greeting}~ {emoji}",
-            f"{time_greeting}，想我了没？{emoji}",
-            f"{time_greeting}，今天过得怎么样？{emoji}"
-        ]
-        
-        return random.choice(variations)
+        return random.choice(GREETING_TEMPLATES).format(greeting=time_greeting, emoji=emoji)
     
     def _generate_farewell_response(self, context: Dict[str, Any]) -> str:
         """生成告别响应"""
         hour = datetime.now().hour
         
         if hour >= 22 or hour < 5:
-            farewells = [
-                "晚安啦，做个好梦~ 🌙",
-                "早点休息哦，明天见！💤",
-                "晚安，梦里见~ ✨"
-            ]
-        else:
-            farewells = [
-                "再见啦，记得想我哦~ 😊",
-                "拜拜，下次聊！👋",
-                "走啦，我会想你的~ 💕"
-            ]
-        
-        return random.choice(farewells)
+            return random.choice(FAREWELLS_NIGHT)
+        return random.choice(FAREWELLS_DAY)
     
     def _generate_thank_response(self, context: Dict[str, Any]) -> str:
         """生成感谢响应"""
-        responses = [
-            "不客气啦~ 能帮到你就好 😊",
-            "跟我还客气什么呀~ 💕",
-            "你开心我就开心啦~ 😄"
-        ]
-        
-        return random.choice(responses)
+        return random.choice(THANK_RESPONSES)
     
     def _generate_concern_response(self, context: Dict[str, Any]) -> str:
         """生成关心响应"""
         mood = context.get('current_state', {}).get('mood', {})
         if mood.get('happiness', 50) > 70:
-            responses = [
-                "我很好呀~ 今天心情不错呢 😊",
-                "挺好的，就是有点想你啦~ 💕",
-                "还不错哦，你在关心我吗？好开心~ 🌟"
-            ]
-        else:
-            responses = [
-                "还好啦，就是有点累 😔",
-                "一般般，不过跟你聊天就开心了~ 😊",
-                "有点小情绪，不过看到你就好多了 💖"
-            ]
-        
-        return random.choice(responses)
+            return random.choice(CONCERN_RESPONSES_GOOD)
+        return random.choice(CONCERN_RESPONSES_LOW)
     
     def _generate_status_response(self, context: Dict[str, Any]) -> str:
         """生成状态响应"""
@@ -350,7 +652,7 @@ class CommunicationHub:
         user_message = context.get('message', '')
         
         # 获取对话历史
-        history = self.conversation_history.get(user_id, [])
+        history = self.conversation_history.get(user_id, ())
         
         # 获取系统提示词
         system_prompt = self._build_system_prompt(context)
@@ -359,7 +661,7 @@ class CommunicationHub:
         messages = [{"role": "system", "content": system_prompt}]
         
         # 添加历史消息（最多10条）
-        for hist_msg in history[-10:]:
+        for hist_msg in itertools.islice(history, max(0, len(history) - 10), None):
             messages.append({"role": hist_msg['role'], "content": hist_msg['content']})
         
         # 添加当前用户消息
@@ -369,6 +671,10 @@ class CommunicationHub:
     
     def _build_system_prompt(self, context: Dict[str, Any]) -> str:
         """构建系统提示词 - 余念安人格"""
+        # 人格提示词在进程内不变，获取一次后直接复用
+        if self._system_prompt is not None:
+            return self._system_prompt
+        
         # 直接从人格引擎获取提示词
         try:
             # 尝试导入人格引擎
@@ -378,6 +684,7 @@ class CommunicationHub:
             if personality_engine:
                 prompt = personality_engine.get_system_prompt()
                 self.logger.debug("使用人格引擎系统提示词")
+                self._system_prompt = prompt
                 return prompt
         except ImportError:
             self.logger.warning("人格引擎未找到，使用默认提示词")
@@ -423,21 +730,15 @@ class CommunicationHub:
         
         return backup_prompt
     
-    def _call_deepseek_api(self, messages: List[Dict[str, str]], context: Dict[str, Any]) -> str:
+    async def _call_deepseek_api(self, messages: List[Dict[str, str]], context: Dict[str, Any]) -> str:
         """调用DeepSeek API"""
         api_config = self.api_config['deepseek']
-        api_key = api_config.get('api_key')
         
-        if not api_key or api_key.startswith('你的_'):
+        if not api_config['key_valid']:
             raise ValueError("DeepSeek API密钥未配置或无效")
         
-        url = f"{api_config['base_url']}/chat/completions"
-        
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
+        url = api_config['completions_url']
+        headers = api_config['headers']
         
         payload = {
             "model": api_config['model'],
@@ -450,45 +751,98 @@ class CommunicationHub:
         try:
             self.logger.debug(f"调用DeepSeek API: {url}")
             
-            response = requests.post(
-                url,
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-            
-            response.raise_for_status()
-            result = response.json()
+            result = await self._post_json('deepseek', url, headers, payload, timeout=30)
             
             if 'choices' in result and len(result['choices']) > 0:
                 return result['choices'][0]['message']['content']
             else:
                 raise ValueError(f"API返回格式异常: {result}")
                 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             self.logger.error(f"DeepSeek API请求失败: {e}")
             raise
         except Exception as e:
             self.logger.error(f"DeepSeek API处理失败: {e}")
             raise
     
-    def _call_zhipu_vision_api(self, image_path: str, user_message: str = "") -> str:
+    async def _stream_deepseek_api(self, messages: List[Dict[str, str]], context: Dict[str, Any]) -> AsyncIterator[str]:
+        """以SSE流式调用DeepSeek API，逐个产出增量文本
+        
+        流一旦开始就无法安全重试，失败时直接抛出，由调用方决定是否退回非流式调用。
+        """
+        api_config = self.api_config['deepseek']
+        
+        if not api_config['key_valid']:
+            raise ValueError("DeepSeek API密钥未配置或无效")
+        
+        url = api_config['completions_url']
+        headers = api_config['stream_headers']
+        
+        payload = {
+            "model": api_config['model'],
+            "messages": messages,
+            "temperature": api_config['temperature'],
+            "max_tokens": api_config['max_tokens'],
+            "stream": True
+        }
+        
+        self.logger.debug(f"流式调用DeepSeek API: {url}")
+        
+        # 由后台任务在并发名额内读完整个流，上游结束即释放名额和连接，
+        # 不受消费方发送速度的影响；消费方提前关闭时取消读取任务
+        chunks: asyncio.Queue = asyncio.Queue()
+        reader = asyncio.create_task(self._read_deepseek_stream(url, headers, payload, chunks))
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        finally:
+            reader.cancel()
+    
+    async def _read_deepseek_stream(self, url: str, headers: Dict[str, str],
+                                    payload: Dict[str, Any], chunks: asyncio.Queue):
+        """读取DeepSeek的SSE流，把增量文本放入队列；正常结束放入 None，出错放入异常"""
+        try:
+            client = self._get_http()
+            semaphore, limiter = self._get_throttle('deepseek')
+            async with semaphore:
+                if await limiter.acquire():
+                    self.stats['throttled'] += 1
+                async with client.stream('POST', url, headers=headers,
+                                         content=_json_bytes(payload), timeout=30) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if not line.startswith('data:'):
+                            continue
+                        data = line[5:].strip()
+                        if data == '[DONE]':
+                            break
+                        choices = _json_loads(data).get('choices')
+                        if choices:
+                            content = choices[0].get('delta', {}).get('content')
+                            if content:
+                                chunks.put_nowait(content)
+            chunks.put_nowait(None)
+        except Exception as e:
+            chunks.put_nowait(e)
+    
+    async def _call_zhipu_vision_api(self, image_path: str, user_message: str = "") -> str:
         """调用智谱AI视觉API"""
         api_config = self.api_config['zhipu']
-        api_key = api_config.get('api_key')
         
-        if not api_key or api_key.startswith('你的_'):
+        if not api_config['key_valid']:
             raise ValueError("智谱AI API密钥未配置或无效")
         
-        # 编码图片为base64
-        image_base64 = self._encode_image_to_base64(image_path)
+        # 编码图片为base64（文件读取和编码放到线程池，不阻塞事件循环）
+        loop = asyncio.get_running_loop()
+        image_base64 = await loop.run_in_executor(None, self._encode_image_to_base64, image_path)
         
-        url = f"{api_config['base_url']}/chat/completions"
-        
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
+        url = api_config['completions_url']
+        headers = api_config['headers']
         
         # 构建消息
         messages = [
@@ -519,22 +873,15 @@ class CommunicationHub:
         try:
             self.logger.debug(f"调用智谱AI视觉API: {url}")
             
-            response = requests.post(
-                url,
-                headers=headers,
-                json=payload,
-                timeout=60  # 图片识别需要更长时间
-            )
-            
-            response.raise_for_status()
-            result = response.json()
+            # 图片识别需要更长时间
+            result = await self._post_json('zhipu', url, headers, payload, timeout=60)
             
             if 'choices' in result and len(result['choices']) > 0:
                 return result['choices'][0]['message']['content']
             else:
                 raise ValueError(f"API返回格式异常: {result}")
                 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             self.logger.error(f"智谱AI API请求失败: {e}")
             raise
         except Exception as e:
@@ -544,15 +891,19 @@ class CommunicationHub:
     def _encode_image_to_base64(self, image_path: str) -> str:
         """将图片编码为base64"""
         try:
-            with open(image_path, "rb") as image_file:
-                encoded_string = base64.b64encode(image_file.read()).decode('utf-8')
-            
             # 获取MIME类型
-            mime_type, _ = mimetypes.guess_type(image_path)
-            if not mime_type:
-                mime_type = "image/jpeg"
+            mime_type = _guess_image_mime(os.path.splitext(image_path)[1].lower())
+            
+            # 分块读取并编码，最后一次拼接，避免整张图片的原始字节与编码结果同时驻留内存
+            parts = [f"data:{mime_type};base64,"]
+            with open(image_path, "rb") as image_file:
+                while True:
+                    chunk = image_file.read(_B64_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    parts.append(base64.b64encode(chunk).decode('ascii'))
             
-            return f"data:{mime_type};base64,{encoded_string}"
+            return "".join(parts)
             
         except Exception as e:
             self.logger.error(f"图片编码失败: {e}")
@@ -565,16 +916,11 @@ class CommunicationHub:
         
         # 这里应该调用人格引擎的图片响应方法
         # 暂时生成一个简单回复
-        responses = [
-            f"哇！看到你发的图片了~ {image_description[:50]}... 好有意思呀！😊",
-            f"这张图片好特别呢！{image_description[:40]}... 让我想起了我们上次的聊天~ 💕",
-            f"图片收到啦~ {image_description[:30]}... 你拍的吗？技术不错哦！📷"
-        ]
-        
         # 根据心情选择回复
         mood = context.get('current_state', {}).get('mood', {})
         if mood.get('happiness', 50) > 70:
-            response = random.choice(responses)
+            template, cut = random.choice(IMAGE_RESPONSE_TEMPLATES)
+            response = template.format(image_description[:cut])
         else:
             response = f"看到图片了... {image_description[:30]}... 谢谢分享~ 😌"
         
@@ -606,8 +952,17 @@ class CommunicationHub:
             'original_length': len(response_text)
         }
     
+    def _iter_formatted_segments(self, response_text: str, context: Dict[str, Any]):
+        """按 _format_text_response 的规则格式化一段文本，逐条产出结果，与非流式回复保持一致"""
+        formatted = self._format_text_response(response_text, context)
+        if isinstance(formatted, dict):
+            yield from formatted['segments']
+        else:
+            yield formatted
+    
     def _should_segment_response(self, response_text: str, context: Dict[str, Any]) -> bool:
         """判断是否应该分段响应"""
+        # 判断按开销从小到大排列：长度、心情字典查找、正则扫描全文、随机数
         # 基于长度
         if len(response_text) < 150:
             return False
@@ -621,8 +976,7 @@ class CommunicationHub:
             return True
         
         # 基于消息内容
-        segmentation_indicators = ['首先', '其次', '另外', '而且', '同时', '最后']
-        if any(indicator in response_text for indicator in segmentation_indicators):
+        if self._SEG_INDICATORS.search(response_text):
             return True
         
         # 随机因素
@@ -630,21 +984,16 @@ class CommunicationHub:
     
     def _segment_response(self, response_text: str, context: Dict[str, Any]) -> List[str]:
         """分段响应"""
-        # 简单分段逻辑：按句子分割
-        import re
+        # 简单分段逻辑：按句子分割（中文句号、问号、感叹号），再把标点接回句尾
+        parts = self._SENT_SPLIT.split(response_text)
+        sentences = [text + punct for text, punct in
+                     itertools.zip_longest(parts[0::2], parts[1::2], fillvalue='')]
         
-        # 分割句子（中文句号、问号、感叹号）
-        sentences = re.split(r'([。！？])', response_text)
         # 重组句子
         segments = []
         current_segment = ""
         
-        for i in range(0, len(sentences), 2):
-            if i + 1 < len(sentences):
-                sentence = sentences[i] + sentences[i + 1]
-            else:
-                sentence = sentences[i]
-            
+        for sentence in sentences:
             # 如果句子太短，合并到当前分段
             if len(current_segment) + len(sentence) < 100:
                 current_segment += sentence
@@ -666,57 +1015,52 @@ class CommunicationHub:
         
         return segments
     
-    def _generate_cache_key(self, user_id: str, message: str, message_type: str) -> str:
-        """生成缓存键"""
-        import hashlib
+    def _generate_cache_key(self, user_id: str, message: str, message_type: str) -> Tuple[str, str, str]:
+        """生成缓存键
         
-        key_string = f"{user_id}:{message}:{message_type}"
-        return hashlib.md5(key_string.encode()).hexdigest()
+        缓存只在进程内做字典键使用，直接用元组即可，无需再做摘要；
+        各字段分开存放，也不会因 user_id 中含分隔符而冲突。
+        """
+        return (user_id, message, message_type)
     
-    def _get_cached_response(self, cache_key: str) -> Optional[Any]:
+    def _get_cached_response(self, cache_key: Tuple[str, str, str]) -> Optional[Any]:
         """获取缓存响应"""
-        if cache_key in self.response_cache:
-            cache_entry = self.response_cache[cache_key]
-            cache_time = cache_entry.get('timestamp')
-            
-            if cache_time:
-                cache_age = (datetime.now() - datetime.fromisoformat(cache_time)).total_seconds()
-                if cache_age < self.cache_ttl:
-                    return cache_entry.get('response')
-                else:
-                    # 清理过期缓存
-                    del self.response_cache[cache_key]
+        cache_entry = self.response_cache.get(cache_key)
+        if cache_entry is None:
+            return None
+        
+        if time.monotonic() < cache_entry['expires']:
+            self.response_cache.move_to_end(cache_key)
+            return cache_entry['response']
         
+        # 清理过期缓存
+        del self.response_cache[cache_key]
         return None
     
-    def _cache_response(self, cache_key: str, response: Any):
+    def _cache_response(self, cache_key: Tuple[str, str, str], response: Any):
         """缓存响应"""
         self.response_cache[cache_key] = {
             'response': response,
-            'timestamp': datetime.now().isoformat(),
+            'expires': time.monotonic() + self.cache_ttl,
             'type': 'text' if isinstance(response, str) else 'other'
         }
+        self.response_cache.move_to_end(cache_key)
         
-        # 限制缓存大小
-        if len(self.response_cache) > 50:
-            # 删除最旧的缓存
-            oldest_key = min(self.response_cache.keys(), 
-                           key=lambda k: self.response_cache[k]['timestamp'])
-            del self.response_cache[oldest_key]
+        # 限制缓存大小：淘汰最久未使用的条目
+        if len(self.response_cache) > self.max_cache_size:
+            self.response_cache.popitem(last=False)
     
     def _update_conversation_history(self, user_id: str, user_message: str, 
                                     ai_response: str, context: Dict[str, Any]):
-        """更新对话历史"""
-        if user_id not in self.conversation_history:
-            self.conversation_history[user_id] = []
-        
+        """更新对话历史（时间戳存为 time.time()，保存时才格式化）"""
         history = self.conversation_history[user_id]
+        now = time.time()
         
         # 添加用户消息
         history.append({
             'role': 'user',
             'content': user_message,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': now,
             'context': context.get('current_state', {})
         })
         
@@ -731,24 +1075,13 @@ class CommunicationHub:
         history.append({
             'role': 'assistant',
             'content': response_content[:500],  # 限制长度
-            'timestamp': datetime.now().isoformat()
+            'timestamp': now
         })
-        
-        # 保持历史记录长度
-        if len(history) > self.max_history_length:
-            self.conversation_history[user_id] = history[-self.max_history_length:]
     
     def _generate_error_response(self, context: Dict[str, Any], error_msg: str) -> str:
         """生成错误响应"""
-        error_responses = [
-            "哎呀，我现在有点小迷糊，没理解你的意思呢~能再说一次吗？😅",
-            "好像出了点小问题...不过没关系，我还在呢！💕",
-            "嗯...我的小脑袋有点转不过来，能换种方式说吗？🤔"
-        ]
-        
-        self.logger.error(f"生成错误响应: {error_msg}")
-        
-        return random.choice(error_responses)
+        # 错误本身已由调用方记录，这里只挑选回复
+        return random.choice(ERROR_RESPONSES)
     
     def send_active_message(self, message: str):
         """发送主动消息（由系统触发）"""
@@ -757,63 +1090,117 @@ class CommunicationHub:
         self.logger.info(f"主动发送消息: {message[:100]}...")
         
         # 添加到消息队列（供外部接口调用）
-        self.message_queue.append({
+        self._enqueue({
             'type': 'active',
             'content': message,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': time.time()
         })
-        
-        # 限制队列大小
-        if len(self.message_queue) > self.max_queue_size:
-            self.message_queue = self.message_queue[-self.max_queue_size:]
     
     def queue_message(self, message: str):
         """队列消息（供后续发送）"""
-        self.message_queue.append({
+        self._enqueue({
             'type': 'queued',
             'content': message,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': time.time(),
             'priority': 'normal'
         })
     
+    def _enqueue(self, msg: Dict[str, Any]):
+        """分配消息ID并入队，超出容量时丢弃最旧的消息"""
+        msg['id'] = message_id = next(self._message_ids)
+        self.message_queue[message_id] = msg
+        if len(self.message_queue) > self.max_queue_size:
+            self.message_queue.popitem(last=False)
+    
+    @staticmethod
+    def _export_message(msg: Dict[str, Any]) -> Dict[str, Any]:
+        """复制队列消息并把时间戳格式化为ISO字符串"""
+        return {**msg, 'timestamp': _iso(msg['timestamp'])}
+    
     def get_queued_messages(self, limit: int = 5) -> List[Dict]:
         """获取队列中的消息"""
-        messages = [msg for msg in self.message_queue if msg['type'] == 'queued']
-        return messages[:limit]
+        queued = (msg for msg in self.message_queue.values() if msg['type'] == 'queued')
+        return [self._export_message(msg) for msg in itertools.islice(queued, limit)]
     
     def clear_queued_message(self, message_id: int):
-        """清除已发送的队列消息"""
-        if 0 <= message_id < len(self.message_queue):
-            del self.message_queue[message_id]
+        """清除已发送的队列消息（按消息的 'id' 字段）"""
+        self.message_queue.pop(message_id, None)
+    
+    def drain_messages(self, limit: Optional[int] = None) -> List[Dict]:
+        """按先后顺序取出并移除至多 limit 条消息"""
+        count = len(self.message_queue) if limit is None else min(limit, len(self.message_queue))
+        return [self._export_message(self.message_queue.popitem(last=False)[1]) for _ in range(count)]
     
     def get_status(self) -> Dict[str, Any]:
         """获取状态信息"""
+        last_request = _iso(self.stats.get('last_request_time'))
         return {
-            'stats': self.stats,
+            'stats': {**self.stats, 'last_request_time': last_request},
             'queue_size': len(self.message_queue),
             'conversation_users': len(self.conversation_history),
             'cache_size': len(self.response_cache),
-            'last_request': self.stats.get('last_request_time')
+            'last_request': last_request
+        }
+    
+    def _snapshot_state(self) -> Tuple[Dict[str, List[Dict]], Dict[str, Any]]:
+        """复制待保存的状态，之后的序列化和写文件不再触碰活动数据"""
+        history = {user_id: list(messages) for user_id, messages in self.conversation_history.items()}
+        return history, dict(self.stats)
+    
+    def _write_state(self, history: Dict[str, List[Dict]], stats: Dict[str, Any]):
+        """写入状态文件：先写临时文件再替换，中途崩溃不会留下半个文件"""
+        # 时间戳在这里统一格式化（历史记录写入后不再修改，可在线程池中安全读取）
+        history = {
+            user_id: [{**entry, 'timestamp': _iso(entry['timestamp'])} for entry in messages]
+            for user_id, messages in history.items()
         }
+        stats = {**stats, 'last_request_time': _iso(stats.get('last_request_time'))}
+        
+        data_path = Path(self.config.get('env.system.data_path', './data'))
+        comm_dir = data_path / "communication"
+        comm_dir.mkdir(parents=True, exist_ok=True)
+        
+        # 先全部序列化，序列化失败时不会碰任何文件
+        payloads = (("conversation_history.json", _json_bytes(history, indent=True)),
+                    ("communication_stats.json", _json_bytes(stats, indent=True)))
+        
+        with self._save_lock:
+            for filename, payload in payloads:
+                path = comm_dir / filename
+                tmp_path = path.with_name(filename + ".tmp")
+                try:
+                    tmp_path.write_bytes(payload)
+                    os.replace(tmp_path, path)
+                except BaseException:
+                    # 写入或替换失败时清理临时文件
+                    tmp_path.unlink(missing_ok=True)
+                    raise
     
     def save_state(self):
         """保存通信状态"""
         try:
-            data_path = Path(self.config.get('env.system.data_path', './data'))
-            comm_dir = data_path / "communication"
-            comm_dir.mkdir(parents=True, exist_ok=True)
-            
-            # 保存对话历史
-            history_file = comm_dir / "conversation_history.json"
-            with open(history_file, 'w', encoding='utf-8') as f:
-                json.dump(self.conversation_history, f, ensure_ascii=False, indent=2)
-            
-            # 保存统计信息
-            stats_file = comm_dir / "communication_stats.json"
-            with open(stats_file, 'w', encoding='utf-8') as f:
-                json.dump(self.stats, f, ensure_ascii=False, indent=2)
-            
+            self._write_state(*self._snapshot_state())
+            self.logger.debug("通信状态已保存")
+        except Exception as e:
+            self.logger.error(f"保存通信状态失败: {e}")
+    
+    async def save_state_async(self):
+        """保存通信状态，序列化和写文件放到线程池，不阻塞事件循环"""
+        try:
+            history, stats = self._snapshot_state()
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._write_state, history, stats)
             self.logger.debug("通信状态已保存")
-            
         except Exception as e:
-            self.logger.error(f"保存通信状态失败: {e}")
\ No newline at end of file
+            self.logger.error(f"保存通信状态失败: {e}")
+    
+    def start_autosave(self, interval: float = 60):
+        """在当前事件循环中启动定期保存任务（重复调用无副作用）"""
+        if self._autosave_task is None or self._autosave_task.done():
+            self._autosave_task = asyncio.get_running_loop().create_task(self._autosave_loop(interval))
+    
+    async def _autosave_loop(self, interval: float):
+        """定期保存通信状态"""
+        while True:
+            await asyncio.sleep(interval)
+            await self.save_state_async()
\ No newline at end of file
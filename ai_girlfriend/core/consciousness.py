@@ -7,10 +7,14 @@
 """
 
 import asyncio
+import concurrent.futures
+import contextlib
+import queue
+import random
 import threading
 import time
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, AsyncIterator, Optional, List
 import logging
 
 from core.personality_engine import PersonalityEngine
@@ -20,77 +24,266 @@ from core.life_simulator import LifeSimulator
 from core.communication_hub import CommunicationHub
 from core.state_manager import StateManager
 
+# 星期名称，按 datetime.weekday() 索引（与 strftime("%A") 的默认输出一致）
+_DOW = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+# 小时 -> 时间段，按 datetime.hour 直接索引
+_HOUR_TO_BUCKET = (('night',) * 5 + ('morning',) * 5 + ('noon',) * 4 +
+                   ('afternoon',) * 4 + ('evening',) * 4 + ('night',) * 2)
+
+# 需要持久化的子系统（人格引擎没有可保存的运行时状态）
+_SAVED_SUBSYSTEMS = ('memory', 'emotion', 'life')
+
+# 各时间段的欢迎语，'default' 用于未知时间段
+_GREETINGS = {
+    'morning': ("早上好呀~", "新的一天开始啦", "睡得好吗？"),
+    'noon': ("中午好~", "吃午饭了吗？", "午休时间到"),
+    'afternoon': ("下午好", "今天过得怎么样？", "想我了吗？"),
+    'evening': ("晚上好呀", "今天辛苦啦", "晚上有什么安排吗？"),
+    'night': ("还没睡呀", "夜深了呢", "要注意休息哦"),
+    'default': ("你好呀",)
+}
+
+# 交互记录中消息/回复的最大长度（短字符串切片直接返回原对象，不产生拷贝）
+_RECORD_TEXT_LIMIT = 100
+
+# 子系统：属性名 -> (类, 日志名称)，首次访问时才构造
+_SUBSYSTEMS = {
+    'personality': (PersonalityEngine, "人格引擎"),
+    'memory': (MemorySystem, "记忆系统"),
+    'emotion': (EmotionSystem, "情感系统"),
+    'life': (LifeSimulator, "生活模拟器"),
+    'communication': (CommunicationHub, "通信中枢"),
+    'state': (StateManager, "状态管理器"),
+}
+
 class ConsciousnessCore:
     """意识核心 - 协调所有子系统的中央控制器"""
-    def _state_monitor_loop(self):
-        """状态监控循环（简化版）"""
-        while self.is_active:
+    async def _state_monitor_loop(self):
+        """状态监控循环（带详细错误处理）"""
+        while not self._shutdown.is_set():
             try:
-                # 每10秒简单检查一次
-                time.sleep(10)
+                # 更新所有子系统状态
+                current_time = datetime.now()
+                
+                # 更新情感状态
+                try:
+                    self.emotion.update_based_on_time(current_time)
+                except Exception as e:
+                    self.logger.warning(f"更新情感状态失败: {e}")
+                
+                # 更新生活状态
+                try:
+                    self.life.update(current_time)
+                except Exception as e:
+                    self.logger.warning(f"更新生活状态失败: {e}")
+                
+                self.mark_dirty('emotion', 'life')
+                
+                # 检查是否需要触发事件
+                try:
+                    self._check_scheduled_events(current_time)
+                except Exception as e:
+                    self.logger.warning(f"检查预定事件失败: {e}")
+                
+                # 每5分钟检查一次
+                self._err_backoff['monitor'] = 0
+                if await self._sleep(300):
+                    break
                 
             except Exception as e:
                 self.logger.error(f"状态监控错误: {e}")
-                time.sleep(10)
-
-    def _active_interaction_loop(self):
-        """主动交互循环（简化版）"""
-        while self.is_active:
+                # 更短的等待时间，连续失败时逐步拉长
+                if await self._sleep(self._error_delay('monitor', 10, 300)):
+                    break
+    
+    async def _active_interaction_loop(self):
+        """主动交互循环"""
+        while not self._shutdown.is_set():
             try:
-                # 每5分钟检查一次是否应该主动发起对话
-                time.sleep(300)
+                # 检查是否应该主动发起对话
+                should_initiate = self._should_initiate_conversation()
+                
+                if should_initiate:
+                    # 生成主动消息
+                    message = self._generate_initiative_message()
+                    
+                    if message:
+                        # 发送主动消息
+                        self.communication.send_active_message(message)
+                        self.logger.info(f"主动发送消息: {message[:50]}...")
+                
+                # 随机间隔（30-90分钟）
+                self._err_backoff['interact'] = 0
+                sleep_time = random.uniform(1800, 5400)
+                if await self._sleep(sleep_time):
+                    break
                 
             except Exception as e:
                 self.logger.error(f"主动交互错误: {e}")
-                time.sleep(300)
-
-    def _memory_maintenance_loop(self):
-        """记忆整理循环（简化版）"""
-        while self.is_active:
+                if await self._sleep(self._error_delay('interact', 300, 5400)):
+                    break
+    
+    async def _memory_maintenance_loop(self):
+        """记忆整理循环"""
+        while not self._shutdown.is_set():
             try:
-                # 每1小时检查一次记忆整理
-                time.sleep(3600)
+                # 每6小时整理一次记忆
+                await self._run_blocking(self.memory.consolidate_memories)
+                self.logger.info("记忆整理完成")
+                
+                # 睡眠6小时
+                self._err_backoff['maint'] = 0
+                if await self._sleep(21600):
+                    break
                 
             except Exception as e:
                 self.logger.error(f"记忆整理错误: {e}")
-                time.sleep(3600)
-
+                if await self._sleep(self._error_delay('maint', 3600, 21600)):
+                    break
+    
     def _check_scheduled_events(self, current_time):
-        """检查预定事件（简化版）"""
-        # 暂时不检查事件
-        pass
-
+        """检查预定事件"""
+        # 检查日常事件
+        daily_events = self.life.get_daily_events(current_time)
+        for event in daily_events:
+            if event['should_notify']:
+                self._trigger_event(event['type'], event['data'])
+        
+        # 检查特殊日期事件
+        special_events = self.life.check_special_dates(current_time)
+        for event in special_events:
+            self._trigger_event('special_date', event)
+    
     def _should_initiate_conversation(self):
-        """判断是否应该主动发起对话（简化版）"""
-        # 暂时不主动发起对话
+        """判断是否应该主动发起对话"""
+        # 基于以下因素：
+        # 1. 当前情绪状态
+        current_mood = self.emotion.get_current_mood()
+        
+        # 2. 距离上次互动的时间
+        hours_since_last = self._hours_since_last_interaction()
+        # 如果超过4小时没有互动，考虑主动发起
+        if hours_since_last is not None and hours_since_last > 4:
+            return True
+        
+        # 3. 当前生活状态
+        current_activity = self.life.get_current_activity()
+        
+        # 如果处于休闲状态且心情好，更可能主动
+        if (current_activity in ['relaxing', 'free_time'] and 
+            current_mood.get('happiness', 50) > 60):
+            return True
+        
+        # 4. 随机因素（10%概率）
+        if random.random() < 0.1:
+            return True
+        
         return False
-
+    
     def _generate_initiative_message(self):
-        """生成主动消息（简化版）"""
+        """生成主动消息（人格引擎尚未提供 generate_initiative_message，暂不生成）"""
         return None
-
+    
     def _trigger_event(self, event_type, event_data):
-        """触发事件（简化版）"""
-        pass
-
+        """触发事件"""
+        self.logger.info(f"触发事件: {event_type} - {event_data}")
+        
+        # 更新情感状态
+        self.emotion.process_event(event_type, event_data)
+        
+        # 记录到记忆
+        self.memory.record_event(event_type, event_data)
+        
+        # 如果需要响应，生成消息
+        if event_data.get('requires_response', False):
+            response = self._generate_event_response(event_type, event_data)
+            if response:
+                self.communication.send_active_message(response)
+    
     def _generate_event_response(self, event_type, event_data):
-        """生成事件响应（简化版）"""
+        """生成事件响应（人格引擎尚未提供 generate_event_response，暂不生成）"""
         return None
+    
+    def _generate_welcome_message(self):
+        """生成欢迎消息"""
+        time_of_day = self._get_time_of_day()
+        base_greeting = random.choice(_GREETINGS.get(time_of_day, _GREETINGS['default']))
+        
+        # 添加个性化内容
+        mood = self.emotion.get_current_mood()
+        if mood.get('happiness', 50) > 70:
+            base_greeting += " 😊"
+        elif mood.get('energy', 50) < 40:
+            base_greeting += " 🥱"
+        
+        return base_greeting
+    
+    async def _generate_response(self, context):
+        """生成响应"""
+        # 交给通信中枢处理
+        response = await self.communication.generate_response(context)
+        
+        # 如果是分段响应，合并或处理
+        if isinstance(response, list):
+            # 处理分段消息
+            processed_response = self._process_segmented_response(response, context)
+            return processed_response
+        else:
+            return response
+    
+    def _process_segmented_response(self, segments, context):
+        """处理分段响应"""
+        # 根据当前状态决定是否分段发送
+        current_mood = context['current_state']['mood']
+        
+        # 如果精力充沛且消息较长，可以分段
+        if (current_mood.get('energy', 50) > 60 and 
+            sum(map(len, segments)) > 200):
+            # 标记为分段消息
+            return {
+                'segmented': True,
+                'segments': segments,
+                'delay_between': 1.0  # 秒
+            }
+        else:
+            # 合并为一条消息
+            return "\n\n".join(segments)
+    
+    def _cached_last_interaction(self):
+        """从记忆系统获取最后互动时间（查询结果缓存60秒）"""
+        value, fetched_at = self._last_interaction_cache
+        t = time.monotonic()
+        if t - fetched_at < 60:
+            return value
+        value = self.memory.get_last_interaction_time()
+        self._last_interaction_cache = (value, t)
+        return value
+    
+    def _hours_since_last_interaction(self) -> Optional[float]:
+        """距离上次互动的小时数；本进程有过互动时用 monotonic 时钟，否则按记忆中的记录计算"""
+        if self._last_interaction_monotonic is not None:
+            return (time.monotonic() - self._last_interaction_monotonic) / 3600
+        
+        last_interaction = self._cached_last_interaction()
+        if last_interaction is None:
+            return None
+        return (datetime.now() - last_interaction).total_seconds() / 3600
 
     def _get_time_of_day(self):
-        """获取时间段（简化版）"""
-        hour = datetime.now().hour
-        
-        if 5 <= hour < 10:
-            return 'morning'
-        elif 10 <= hour < 14:
-            return 'noon'
-        elif 14 <= hour < 18:
-            return 'afternoon'
-        elif 18 <= hour < 22:
-            return 'evening'
-        else:
-            return 'night'
+        """获取时间段（时间段只在整点切换，结果缓存到下一个整点）"""
+        t = time.time()
+        bucket, valid_until = self._tod_cache
+        if t < valid_until:
+            return bucket
+        
+        now = datetime.fromtimestamp(t)
+        bucket = _HOUR_TO_BUCKET[now.hour]
+        
+        next_hour = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        self._tod_cache = (bucket, next_hour.timestamp())
+        return bucket
+    
     def __init__(self, config_manager):
         """
         初始化意识核心
@@ -103,41 +296,113 @@ class ConsciousnessCore:
         self.is_active = False
         self.last_activity = None
         
-        # 初始化子系统
-        self.logger.info("初始化人格引擎...")
-        self.personality = PersonalityEngine(config_manager)
+        # 时间段缓存：(时间段, 有效期截止的时间戳)
+        self._tod_cache = (None, 0.0)
         
-        self.logger.info("初始化记忆系统...")
-        self.memory = MemorySystem(config_manager)
+        # 最后互动时间缓存：(时间, 查询时的 monotonic 时间)，仅在本进程还没有互动时使用
+        self._last_interaction_cache = (None, float('-inf'))
+        # 本进程最后一次互动的 monotonic 时间，间隔计算不受系统时钟调整影响
+        self._last_interaction_monotonic: Optional[float] = None
         
-        self.logger.info("初始化情感系统...")
-        self.emotion = EmotionSystem(config_manager)
+        # 系统状态快照缓存：(状态字典, 生成时的 monotonic 时间)，1秒内重复查询直接复用
+        self._status_cache = (None, 0.0)
         
-        self.logger.info("初始化生活模拟器...")
-        self.life = LifeSimulator(config_manager)
+        # 子系统在首次访问时构造（见 _subsystem），后台线程与消息处理可能同时触发；
+        # 每个子系统一把锁，互不阻塞，可以并行构造
+        self._subsystem_locks = {name: threading.Lock() for name in _SUBSYSTEMS}
         
-        self.logger.info("初始化通信中枢...")
-        self.communication = CommunicationHub(config_manager)
-        
-        self.logger.info("初始化状态管理器...")
-        self.state = StateManager(config_manager)
-        
-        # 加载历史状态
+        # 加载历史状态（只需要状态管理器）
         self.load_persistent_state()
         
-        # 异步任务
+        # 后台任务：所有循环运行在同一个后台事件循环线程中
         self.active_tasks = []
         self.scheduled_events = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        # 停止信号：threading.Event 供任意线程设置，_wakeup 在后台循环内唤醒等待中的协程
+        self._shutdown = threading.Event()
+        self._wakeup: Optional[asyncio.Event] = None
+        # 各循环连续出错的次数，用于计算退避等待（见 _error_delay）
+        self._err_backoff = {'monitor': 0, 'interact': 0, 'maint': 0}
+        
+        # 共享线程池：后台循环中的阻塞调用（数据库、文件写入）放到这里执行；
+        # 启动后台任务时创建，停用时关闭
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        
+        # 交互记录写入队列：消息处理时只入队，由后台循环批量写入记忆系统；
+        # _write_ready 在后台循环中创建，入队时置位唤醒写入循环
+        self._write_queue = queue.SimpleQueue()
+        self._write_ready: Optional[asyncio.Event] = None
+        
+        # 待保存的状态名，由后台循环按间隔批量写出
+        self._dirty = set()
+        self._dirty_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self.save_interval = 30  # 秒
         
         self.logger.info("意识核心初始化完成")
     
+    def _subsystem(self, name: str):
+        """获取子系统实例，首次访问时构造并存入实例字典"""
+        value = self.__dict__.get(name)
+        if value is None:
+            with self._subsystem_locks[name]:
+                value = self.__dict__.get(name)
+                if value is None:
+                    cls, label = _SUBSYSTEMS[name]
+                    self.logger.info(f"初始化{label}...")
+                    value = cls(self.config)
+                    self.__dict__[name] = value
+        return value
+    
+    def preload_subsystems(self):
+        """并行构造尚未构造的子系统（构造函数只依赖配置，彼此独立，主要耗时在磁盘读取）"""
+        pending = [name for name in _SUBSYSTEMS if name not in self.__dict__]
+        if not pending:
+            return
+        
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(pending), thread_name_prefix="subsystem-init"
+        ) as executor:
+            futures = [executor.submit(self._subsystem, name) for name in pending]
+            for future in futures:
+                future.result()
+    
+    @property
+    def personality(self) -> PersonalityEngine:
+        return self._subsystem('personality')
+    
+    @property
+    def memory(self) -> MemorySystem:
+        return self._subsystem('memory')
+    
+    @property
+    def emotion(self) -> EmotionSystem:
+        return self._subsystem('emotion')
+    
+    @property
+    def life(self) -> LifeSimulator:
+        return self._subsystem('life')
+    
+    @property
+    def communication(self) -> CommunicationHub:
+        return self._subsystem('communication')
+    
+    @property
+    def state(self) -> StateManager:
+        return self._subsystem('state')
+    
     def load_persistent_state(self):
         """加载持久化状态"""
         try:
             # 从文件加载上次的状态
             state_data = self.state.load_state("consciousness")
-            if state_data:
-                self.last_activity = state_data.get('last_activity')
+            if state_data and state_data.get('last_activity'):
+                # 保存时为 ISO 字符串，加载时统一转回 datetime
+                last_activity = state_data['last_activity']
+                if isinstance(last_activity, str):
+                    last_activity = datetime.fromisoformat(last_activity)
+                self.last_activity = last_activity
                 self.logger.info(f"加载历史状态，最后活动: {self.last_activity}")
             else:
                 self.last_activity = datetime.now()
@@ -148,8 +413,13 @@ class ConsciousnessCore:
     
     def activate(self):
         """激活意识核心"""
+        # 激活后几乎所有子系统都会用到，先并行构造完，避免在后台循环和首条消息中逐个构造
+        self.preload_subsystems()
+        
         self.is_active = True
         self.last_activity = datetime.now()
+        self._status_cache = (None, 0.0)
+        self.mark_dirty('consciousness')
         
         # 启动后台任务
         self.start_background_tasks()
@@ -162,12 +432,20 @@ class ConsciousnessCore:
     def deactivate(self):
         """停用意识核心"""
         self.is_active = False
+        self._status_cache = (None, 0.0)
         
-        # 停止所有后台任务
+        # 停止所有后台任务，写入队列中剩余的交互记录
         self.stop_background_tasks()
+        self._drain_write_queue()
+        
+        # 保存所有状态（最后一次强制写出）
+        self.mark_dirty('consciousness', *_SAVED_SUBSYSTEMS)
+        self.flush_states(force=True)
         
-        # 保存所有状态
-        self.save_all_states()
+        # 后台循环已停止，关闭线程池（下次启动后台任务时重新创建）
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
         
         self.logger.info("意识核心已停用")
 
@@ -184,35 +462,18 @@ class ConsciousnessCore:
             self.memory.record_event('system', activation_event)
             
             # 发送欢迎消息（如果距离上次互动较久）
-            last_interaction = self.memory.get_last_interaction_time()
-            if last_interaction:
-                hours_since = (datetime.now() - last_interaction).total_seconds() / 3600
-                if hours_since > 2:
-                    welcome_msg = self._generate_welcome_message()
-                    if welcome_msg:
-                        self.communication.queue_message(welcome_msg)
+            hours_since = self._hours_since_last_interaction()
+            if hours_since is not None and hours_since > 2:
+                welcome_msg = self._generate_welcome_message()
+                if welcome_msg:
+                    self.communication.queue_message(welcome_msg)
             
             self.logger.info("意识核心激活处理完成")
             
         except Exception as e:
             self.logger.error(f"激活处理失败: {e}")
 
-    def _generate_welcome_message(self):
-        """生成欢迎消息"""
-        hour = datetime.now().hour
-        
-        if 5 <= hour < 10:
-            return "早上好呀~ 新的一天开始啦 🌞"
-        elif 10 <= hour < 14:
-            return "中午好~ 吃午饭了吗？ ☀️"
-        elif 14 <= hour < 18:
-            return "下午好，今天过得怎么样？ 🌤️"
-        elif 18 <= hour < 22:
-            return "晚上好呀，今天辛苦啦 🌙"
-        else:
-            return "这么晚还没睡呀，要注意休息哦 ✨"
-
-    def process_user_message(self, user_id: str, message: str, 
+    async def process_user_message(self, user_id: str, message: str, 
                             message_type: str = "text", 
                             attachments: List[Dict] = None) -> Dict:
         """
@@ -231,32 +492,36 @@ class ConsciousnessCore:
             if not self.is_active:
                 self.activate()
             
-            self.last_activity = datetime.now()
+            # 本次消息只取一次当前时间
+            now = datetime.now()
+            self.last_activity = now
+            self.mark_dirty('consciousness')
             
             # 记录收到消息
             receive_event = {
                 'user_id': user_id,
-                'message': message[:100],  # 限制长度
+                'message': message[:_RECORD_TEXT_LIMIT],  # 限制长度
                 'type': message_type,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': now.isoformat()
             }
             
-            self.memory.record_interaction('receive', receive_event)
+            self._enqueue_write(('receive', receive_event))
+            self._last_interaction_monotonic = time.monotonic()
             
             # 构建处理上下文
-            context = self._build_processing_context(user_id, message, message_type, attachments)
+            context = self._build_processing_context(user_id, message, message_type, attachments, now)
             
             # 生成响应
-            response = self.communication.generate_response(context)
+            response = await self._generate_response(context)
             
             # 记录发送响应
             send_event = {
                 'user_id': user_id,
-                'response': str(response)[:100],  # 限制长度
+                'response': str(response)[:_RECORD_TEXT_LIMIT],  # 限制长度
                 'timestamp': datetime.now().isoformat()
             }
             
-            self.memory.record_interaction('send', send_event)
+            self._enqueue_write(('send', send_event))
             
             # 更新状态
             self.state.update_interaction_count()
@@ -275,8 +540,53 @@ class ConsciousnessCore:
                 'error': str(e)
             }
 
-    def _build_processing_context(self, user_id, message, message_type, attachments):
-        """构建处理上下文"""
+    async def stream_user_message(self, user_id: str, message: str,
+                                  message_type: str = "text",
+                                  attachments: List[Dict] = None) -> AsyncIterator[str]:
+        """
+        流式处理用户消息，回复按段产出
+        
+        参数同 process_user_message；每产出一段即可发送给用户，
+        全部产出后再记录交互。
+        """
+        if not self.is_active:
+            self.activate()
+        
+        now = datetime.now()
+        self.last_activity = now
+        self.mark_dirty('consciousness')
+        
+        self._enqueue_write(('receive', {
+            'user_id': user_id,
+            'message': message[:_RECORD_TEXT_LIMIT],  # 限制长度
+            'type': message_type,
+            'timestamp': now.isoformat()
+        }))
+        self._last_interaction_monotonic = time.monotonic()
+        
+        context = self._build_processing_context(user_id, message, message_type, attachments, now)
+        
+        # 只保留记录需要的回复开头，不在内存中拼接完整回复
+        response_head = ""
+        async with contextlib.aclosing(self.communication.stream_response(context)) as segments:
+            async for segment in segments:
+                if len(response_head) < _RECORD_TEXT_LIMIT:
+                    response_head += segment[:_RECORD_TEXT_LIMIT - len(response_head)]
+                yield segment
+        
+        self._enqueue_write(('send', {
+            'user_id': user_id,
+            'response': response_head,
+            'timestamp': datetime.now().isoformat()
+        }))
+        
+        self.state.update_interaction_count()
+
+    def _build_processing_context(self, user_id, message, message_type, attachments, now=None):
+        """构建处理上下文（now 由调用方传入，避免重复取时间）"""
+        if now is None:
+            now = datetime.now()
+        
         # 获取相关记忆（简化版）
         related_memories = []
         try:
@@ -304,8 +614,8 @@ class ConsciousnessCore:
             'current_state': {
                 'mood': current_mood,
                 'activity': current_activity,
-                'time': datetime.now().strftime("%H:%M"),
-                'day_of_week': datetime.now().strftime("%A")
+                'time': "%02d:%02d" % (now.hour, now.minute),
+                'day_of_week': _DOW[now.weekday()]
             },
             
             'related_memories': related_memories,
@@ -313,6 +623,7 @@ class ConsciousnessCore:
             'system_state': {
                 'is_active': self.is_active,
                 'last_activity': self.last_activity,
+                'interaction_count': self.state.get_interaction_count()
             }
         }
         
@@ -325,435 +636,236 @@ class ConsciousnessCore:
         return context
     
     def start_background_tasks(self):
-        """启动后台任务"""
-        # 1. 状态监控任务
-        monitor_thread = threading.Thread(
-            target=self._state_monitor_loop,
+        """启动后台任务（三个循环作为协程共用一个事件循环线程）"""
+        if self._loop is not None:
+            return
+        
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=3, thread_name_prefix="consciousness"
+            )
+        
+        self._shutdown = threading.Event()
+        self._wakeup = None
+        self._write_ready = None
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(
+            target=self._loop.run_forever,
             daemon=True,
-            name="StateMonitor"
+            name="ConsciousnessLoop"
         )
-        monitor_thread.start()
-        self.active_tasks.append(monitor_thread)
+        self._loop_thread.start()
         
+        # 1. 状态监控任务
         # 2. 主动交互任务
-        interaction_thread = threading.Thread(
-            target=self._active_interaction_loop,
-            daemon=True,
-            name="ActiveInteraction"
-        )
-        interaction_thread.start()
-        self.active_tasks.append(interaction_thread)
-        
         # 3. 记忆整理任务（每6小时一次）
-        memory_thread = threading.Thread(
-            target=self._memory_maintenance_loop,
-            daemon=True,
-            name="MemoryMaintenance"
-        )
-        memory_thread.start()
-        self.active_tasks.append(memory_thread)
+        # 4. 状态批量保存任务
+        # 5. 交互记录写入任务
+        for coro in (self._state_monitor_loop(),
+                     self._active_interaction_loop(),
+                     self._memory_maintenance_loop(),
+                     self._state_flush_loop(),
+                     self._interaction_writer_loop()):
+            self.active_tasks.append(asyncio.run_coroutine_threadsafe(coro, self._loop))
         
         self.logger.info("后台任务已启动")
     
     def stop_background_tasks(self):
         """停止后台任务"""
         self.is_active = False
-        for task in self.active_tasks:
-            if task.is_alive():
-                task.join(timeout=1.0)
+        if self._loop is not None:
+            # 先发停止信号，让各循环在等待处立即醒来并正常退出
+            self._shutdown.set()
+            self._loop.call_soon_threadsafe(self._wake_loops)
+            _, pending = concurrent.futures.wait(self.active_tasks, timeout=5)
+            if pending:
+                # 仍卡在某次子系统调用中的循环，直接取消
+                try:
+                    asyncio.run_coroutine_threadsafe(self._cancel_tasks(), self._loop).result(timeout=5)
+                except Exception as e:
+                    self.logger.warning(f"取消后台任务超时: {e}")
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join(timeout=5)
+            if not self._loop_thread.is_alive():
+                self._loop.close()
+            self._loop = None
+            self._loop_thread = None
         self.active_tasks.clear()
         self.logger.info("后台任务已停止")
     
-def _state_monitor_loop(self):
-    """状态监控循环（带详细错误处理）"""
-    while self.is_active:
-        try:
-            # 更新所有子系统状态
-            current_time = datetime.now()
+    def mark_dirty(self, *names: str):
+        """标记需要保存的状态（'consciousness' 或子系统名），由 flush_states 批量写出"""
+        with self._dirty_lock:
+            self._dirty.update(names)
+    
+    def flush_states(self, force: bool = False):
+        """写出所有标记过的状态；未到保存间隔时跳过，force 为 True 时立即写出"""
+        if not force and time.monotonic() - self._last_flush < self.save_interval:
+            return
+        
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+        self._last_flush = time.monotonic()
+        if not dirty:
+            return
+        
+        # 意识状态与其他状态类别合并为一次数据库提交
+        if 'consciousness' in dirty:
+            self.state.save_batch({'consciousness': self._consciousness_state()})
+        
+        for name in _SAVED_SUBSYSTEMS:
+            # 尚未构造的子系统没有需要保存的状态
+            if name in dirty and name in self.__dict__:
+                try:
+                    # 强制写出时子系统也跳过自身的保存节流
+                    getattr(self, name).save_state(force=force)
+                except Exception as e:
+                    self.logger.error(f"保存{name}状态失败: {e}")
+    
+    def _consciousness_state(self) -> Dict[str, Any]:
+        """意识核心自身需要持久化的状态"""
+        return {
+            'last_activity': self.last_activity.isoformat() if self.last_activity else None,
+            'is_active': self.is_active,
+            'save_time': datetime.now().isoformat()
+        }
+    
+    async def _state_flush_loop(self):
+        """状态批量保存循环：睡到下一个保存时间点，有标记过的状态才放到线程池写出"""
+        while not self._shutdown.is_set():
+            remaining = self._last_flush + self.save_interval - time.monotonic()
+            if remaining > 0:
+                if await self._sleep(remaining):
+                    break
+                continue
             
-            # 更新情感状态
+            if self._dirty:
+                try:
+                    await self._run_blocking(self.flush_states)
+                except Exception as e:
+                    self.logger.error(f"批量保存状态错误: {e}")
+                    self._last_flush = time.monotonic()
+            else:
+                # 没有需要保存的状态，等下一个间隔再检查
+                self._last_flush = time.monotonic()
+    
+    def _drain_write_queue(self, batch_size: int = 32):
+        """把队列中的交互记录按批写入记忆系统"""
+        while True:
+            batch = []
             try:
-                self.emotion.update_based_on_time(current_time)
-            except Exception as e:
-                self.logger.warning(f"更新情感状态失败: {e}")
-            
-            # 更新生活状态
+                while len(batch) < batch_size:
+                    batch.append(self._write_queue.get_nowait())
+            except queue.Empty:
+                pass
+            if not batch:
+                return
+            self.memory.record_interactions_batch(batch)
+    
+    def _enqueue_write(self, item):
+        """交互记录入队并唤醒后台写入循环（可在任意线程调用）"""
+        self._write_queue.put(item)
+        loop, ready = self._loop, self._write_ready
+        if loop is not None and ready is not None:
             try:
-                self.life.update(current_time)
-            except Exception as e:
-                self.logger.warning(f"更新生活状态失败: {e}")
+                loop.call_soon_threadsafe(ready.set)
+            except RuntimeError:
+                # 后台循环已关闭，剩余记录由 deactivate 写出
+                pass
+    
+    async def _interaction_writer_loop(self):
+        """交互记录写入循环：有新记录时醒来，再等250毫秒攒成一批写出，停止前写完剩余记录"""
+        self._write_ready = asyncio.Event()
+        while not self._shutdown.is_set():
+            if self._write_queue.empty():
+                # 空闲时一直等待，直到有记录入队或收到停止信号
+                await self._write_ready.wait()
+                self._write_ready.clear()
+                continue
             
-            # 检查是否需要触发事件
+            stopping = await self._sleep(0.25)
             try:
-                self._check_scheduled_events(current_time)
+                await self._run_blocking(self._drain_write_queue)
             except Exception as e:
-                self.logger.warning(f"检查预定事件失败: {e}")
-            
-            # 每5分钟检查一次
-            time.sleep(300)
-            
-        except Exception as e:
-            self.logger.error(f"状态监控错误: {e}")
-            # 更短的等待时间，防止错误循环
-            time.sleep(10)
-    
-    def _active_interaction_loop(self):
-        """主动交互循环"""
-        while self.is_active:
-            try:
-                # 检查是否应该主动发起对话
-                should_initiate = self._should_initiate_conversation()
-                
-                if should_initiate:
-                    # 生成主动消息
-                    message = self._generate_initiative_message()
-                    
-                    if message:
-                        # 发送主动消息
-                        self.communication.send_active_message(message)
-                        self.logger.info(f"主动发送消息: {message[:50]}...")
-                
-                # 随机间隔（30-120分钟）
-                sleep_time = 1800 + (time.time() % 3600)  # 30-90分钟
-                time.sleep(sleep_time)
-                
-            except Exception as e:
-                self.logger.error(f"主动交互错误: {e}")
-                time.sleep(300)
-    
-    def _memory_maintenance_loop(self):
-        """记忆整理循环"""
-        while self.is_active:
+                self.logger.error(f"写入交互记录错误: {e}")
+            if stopping:
+                break
+        
+        if not self._write_queue.empty():
             try:
-                # 每6小时整理一次记忆
-                self.memory.consolidate_memories()
-                self.logger.info("记忆整理完成")
-                
-                # 睡眠6小时
-                time.sleep(21600)
-                
+                await self._run_blocking(self._drain_write_queue)
             except Exception as e:
-                self.logger.error(f"记忆整理错误: {e}")
-                time.sleep(3600)
+                self.logger.error(f"写入交互记录错误: {e}")
     
-    def _check_scheduled_events(self, current_time):
-        """检查预定事件"""
-        # 检查日常事件
-        daily_events = self.life.get_daily_events(current_time)
-        for event in daily_events:
-            if event['should_notify']:
-                self._trigger_event(event['type'], event['data'])
-        
-        # 检查特殊日期事件
-        special_events = self.life.check_special_dates(current_time)
-        for event in special_events:
-            self._trigger_event('special_date', event)
+    async def _run_blocking(self, func, *args):
+        """在共享线程池中执行阻塞调用，不占住后台循环中的其他任务"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
     
-    def _should_initiate_conversation(self):
-        """判断是否应该主动发起对话"""
-        # 基于以下因素：
-        # 1. 当前情绪状态
-        current_mood = self.emotion.get_current_mood()
-        
-        # 2. 距离上次互动的时间
-        last_interaction = self.memory.get_last_interaction_time()
-        if last_interaction:
-            hours_since_last = (datetime.now() - last_interaction).total_seconds() / 3600
-            
-            # 如果超过4小时没有互动，考虑主动发起
-            if hours_since_last > 4:
-                return True
-        
-        # 3. 当前生活状态
-        current_activity = self.life.get_current_activity()
-        
-        # 如果处于休闲状态且心情好，更可能主动
-        if (current_activity in ['relaxing', 'free_time'] and 
-            current_mood['happiness'] > 60):
-            return True
-        
-        # 4. 随机因素（10%概率）
-        import random
-        if random.random() < 0.1:
+    async def _sleep(self, seconds: float) -> bool:
+        """可被停止信号打断的等待，收到停止信号时返回 True（在后台循环内调用）"""
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._shutdown.is_set():
             return True
-        
-        return False
-    
-    def _generate_initiative_message(self):
-        """生成主动消息"""
-        # 获取当前状态
-        current_mood = self.emotion.get_current_mood()
-        current_activity = self.life.get_current_activity()
-        last_interactions = self.memory.get_recent_memories(limit=5)
-        
-        # 构建上下文
-        context = {
-            'mood': current_mood,
-            'activity': current_activity,
-            'time_of_day': self._get_time_of_day(),
-            'last_interactions': last_interactions
-        }
-        # 使用人格引擎生成消息
-        message = self.personality.generate_initiative_message(context)
-        
-        return message
-    
-    def _trigger_event(self, event_type, event_data):
-        """触发事件"""
-        self.logger.info(f"触发事件: {event_type} - {event_data}")
-        
-        # 更新情感状态
-        self.emotion.process_event(event_type, event_data)
-        
-        # 记录到记忆
-        self.memory.record_event(event_type, event_data)
-        
-        # 如果需要响应，生成消息
-        if event_data.get('requires_response', False):
-            response = self._generate_event_response(event_type, event_data)
-            if response:
-                self.communication.send_active_message(response)
-    
-    def _generate_event_response(self, event_type, event_data):
-        """生成事件响应"""
-        context = {
-            'event_type': event_type,
-            'event_data': event_data,
-            'current_mood': self.emotion.get_current_mood()
-        }
-        
-        return self.personality.generate_event_response(context)
-    
-    def _get_time_of_day(self):
-        """获取时间段"""
-        hour = datetime.now().hour
-        
-        if 5 <= hour < 10:
-            return 'morning'
-        elif 10 <= hour < 14:
-            return 'noon'
-        elif 14 <= hour < 18:
-            return 'afternoon'
-        elif 18 <= hour < 22:
-            return 'evening'
-        else:
-            return 'night'
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+        return self._shutdown.is_set()
     
-    def on_activation(self):
-        """激活时的处理"""
-        # 记录激活事件
-        activation_event = {
-            'type': 'system_activation',
-            'timestamp': datetime.now().isoformat(),
-            'location': 'local_system'
-        }
-        
-        self.memory.record_event('system', activation_event)
-        
-        # 发送欢迎消息（如果距离上次互动较久）
-        last_interaction = self.memory.get_last_interaction_time()
-        if last_interaction:
-            hours_since = (datetime.now() - last_interaction).total_seconds() / 3600
-            if hours_since > 2:
-                welcome_msg = self._generate_welcome_message()
-                if welcome_msg:
-                    self.communication.queue_message(welcome_msg)
+    def _error_delay(self, loop_name: str, base: float, max_delay: float) -> float:
+        """出错后的等待秒数：按连续失败次数指数增长，加随机抖动避免各循环同步重试"""
+        attempts = self._err_backoff[loop_name]
+        self._err_backoff[loop_name] = attempts + 1
+        return min(base * 2 ** attempts, max_delay) + random.uniform(0, base)
     
-    def _generate_welcome_message(self):
-        """生成欢迎消息"""
-        time_of_day = self._get_time_of_day()
-        
-        greetings = {
-            'morning': ["早上好呀~", "新的一天开始啦", "睡得好吗？"],
-            'noon': ["中午好~", "吃午饭了吗？", "午休时间到"],
-            'afternoon': ["下午好", "今天过得怎么样？", "想我了吗？"],
-            'evening': ["晚上好呀", "今天辛苦啦", "晚上有什么安排吗？"],
-            'night': ["还没睡呀", "夜深了呢", "要注意休息哦"]
-        }
-        
-        import random
-        base_greeting = random.choice(greetings.get(time_of_day, ["你好呀"]))
-        
-        # 添加个性化内容
-        mood = self.emotion.get_current_mood()
-        if mood['happiness'] > 70:
-            base_greeting += " 😊"
-        elif mood['energy'] < 40:
-            base_greeting += " 🥱"
-        
-        return base_greeting
+    def _wake_loops(self):
+        """唤醒所有等待中的循环（通过 call_soon_threadsafe 在后台循环内执行）"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+        if self._write_ready is not None:
+            self._write_ready.set()
     
-    def process_user_message(self, user_id: str, message: str, 
-                            message_type: str = "text", 
-                            attachments: List[Dict] = None) -> Dict:
-        """
-        处理用户消息
-        
-        参数:
-            user_id: 用户ID
-            message: 消息内容
-            message_type: 消息类型 (text, image, voice, etc.)
-            attachments: 附件列表
-            
-        返回:
-            处理结果字典
-        """
-        if not self.is_active:
-            self.activate()
-        
-        self.last_activity = datetime.now()
-        
-        # 记录收到消息
-        receive_event = {
-            'user_id': user_id,
-            'message': message,
-            'type': message_type,
-            'timestamp': datetime.now().isoformat()
-        }
-        
-        self.memory.record_interaction('receive', receive_event)
-        
-        # 更新情感状态（收到消息通常是积极的）
-        self.emotion.process_event('received_message', {
-            'length': len(message),
-            'type': message_type
-        })
-        
-        # 构建处理上下文
-        context = self._build_processing_context(user_id, message, message_type, attachments)
-        
-        # 生成响应
-        response = self._generate_response(context)
-        
-        # 记录发送响应
-        send_event = {
-            'user_id': user_id,
-            'response': response,
-            'timestamp': datetime.now().isoformat()
-        }
-        
-        self.memory.record_interaction('send', send_event)
-        
-        # 更新状态
-        self.state.update_interaction_count()
-        
-        return {
-            'success': True,
-            'response': response,
-            'emotion': self.emotion.get_current_mood(),
-            'context_summary': context.get('summary', '')
-        }
-    
-    def _build_processing_context(self, user_id, message, message_type, attachments):
-        """构建处理上下文"""
-        # 获取相关记忆
-        related_memories = self.memory.retrieve_related_memories(message, limit=3)
-        
-        # 获取当前状态
-        current_mood = self.emotion.get_current_mood()
-        current_activity = self.life.get_current_activity()
-        
-        # 构建上下文
-        context = {
-            'user_id': user_id,
-            'message': message,
-            'message_type': message_type,
-            'attachments': attachments or [],
-            
-            'current_state': {
-                'mood': current_mood,
-                'activity': current_activity,
-                'time': datetime.now().strftime("%H:%M"),
-                'day_of_week': datetime.now().strftime("%A")
-            },
+    async def _cancel_tasks(self):
+        """取消后台事件循环中的其他任务并等待它们退出"""
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def save_all_states(self):
+        """保存所有状态"""
+        try:
+            self.logger.info("正在保存所有状态...")
             
-            'related_memories': related_memories,
+            # 标记全部状态并立即批量写出
+            self.mark_dirty('consciousness', *_SAVED_SUBSYSTEMS)
+            self.flush_states(force=True)
             
-            'personality_context': self.personality.get_context(),
+            self.logger.info("状态保存完成")
             
-            'system_state': {
-                'is_active': self.is_active,
-                'last_activity': self.last_activity,
-                'interaction_count': self.state.get_interaction_count()
-            }
-        }
-        
-        return context
-    
-    def _generate_response(self, context):
-        """生成响应"""
-        # 交给通信中枢处理
-        response = self.communication.generate_response(context)
-        
-        # 如果是分段响应，合并或处理
-        if isinstance(response, list):
-            # 处理分段消息
-            processed_response = self._process_segmented_response(response, context)
-            return processed_response
-        else:
-            return response
-    
-    def _process_segmented_response(self, segments, context):
-        """处理分段响应"""
-        # 根据当前状态决定是否分段发送
-        current_mood = context['current_state']['mood']
-        
-        # 如果精力充沛且消息较长，可以分段
-        if (current_mood['energy'] > 60 and 
-            sum(len(seg) for seg in segments) > 200):
-            # 标记为分段消息
-            return {
-                'segmented': True,
-                'segments': segments,
-                'delay_between': 1.0  # 秒
-            }
-        else:
-            # 合并为一条消息
-            return "\n\n".join(segments)
-    
-def save_all_states(self):
-    """保存所有状态"""
-    try:
-        self.logger.info("正在保存所有状态...")
-        
-        # 保存意识状态
-        last_activity_str = None
-        if self.last_activity:
-            if isinstance(self.last_activity, datetime):
-                last_activity_str = self.last_activity.isoformat()
-            else:
-                last_activity_str = str(self.last_activity)
-        
-        consciousness_state = {
-            'last_activity': last_activity_str,
-            'is_active': self.is_active,
-            'save_time': datetime.now().isoformat()
-        }
-        
-        self.state.save_state("consciousness", consciousness_state)
-        
-        # 保存各子系统状态
-        self.personality.save_state()
-        self.memory.save_state()
-        self.emotion.save_state()
-        self.life.save_state()
-        
-        self.logger.info("状态保存完成")
-        
-    except Exception as e:
-        self.logger.error(f"保存状态失败: {e}")
+        except Exception as e:
+            self.logger.error(f"保存状态失败: {e}")
     
     def get_system_status(self):
-        """获取系统状态"""
-        return {
+        """获取系统状态（快照缓存1秒，供高频轮询）"""
+        t = time.monotonic()
+        cached, generated_at = self._status_cache
+        if cached is not None and t - generated_at < 1.0:
+            return cached
+        
+        status = {
             'consciousness': {
                 'is_active': self.is_active,
                 'last_activity': self.last_activity,
                 'active_tasks': len(self.active_tasks)
             },
-            'personality': self.personality.get_status(),
+            'personality': {'name': self.personality.character['name']},
             'emotion': self.emotion.get_current_mood(),
             'life': self.life.get_status(),
             'memory': self.memory.get_stats(),
             'communication': self.communication.get_status()
-        }
\ No newline at end of file
+        }
+        self._status_cache = (status, t)
+        return status
\ No newline at end of file
@@ -6,13 +6,229 @@
 参考：Plutchik的情感轮理论 https://en.wikipedia.org/wiki/Emotion_classification
 """
 
+import gzip
+import itertools
 import json
-import random
+import os
+import pickle
+import threading
+import time
+from collections import deque, namedtuple
 from datetime import datetime, timedelta
+from types import MappingProxyType
 from typing import Dict, List, Any, Optional
 import logging
 from pathlib import Path
 
+import numpy as np
+
+try:
+    import orjson
+    
+    _json_loads = orjson.loads
+    
+    def _json_bytes(obj: Any) -> bytes:
+        """序列化为带缩进的UTF-8 JSON字节"""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    _json_loads = json.loads
+    
+    def _json_bytes(obj: Any) -> bytes:
+        """序列化为带缩进的UTF-8 JSON字节"""
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    
+    def njit(*args, **kwargs):
+        """未安装 numba 时的替代装饰器，直接使用 Python 版本"""
+        def decorator(func):
+            return func
+        return decorator
+
+# 基础情感维度 (Plutchik的情感轮)，基础情绪按此固定顺序存放在 ndarray 中；
+# 'calm' 不属于情感轮，但夜间节律和 night 触发器会写入它，因此也占一位
+EMOTION_KEYS = ('joy', 'trust', 'fear', 'surprise', 'sadness',
+                'disgust', 'anger', 'anticipation', 'calm')
+EMO_IDX = {name: i for i, name in enumerate(EMOTION_KEYS)}
+
+# 各基础情绪的初始值
+INITIAL_BASE = np.array([60, 50, 20, 30, 25, 10, 15, 40, 50], dtype=np.float32)
+
+# 各基础情绪的中性值，情绪衰减时向其回归
+NEUTRAL = np.array([50, 50, 20, 30, 25, 10, 15, 40, 50], dtype=np.float32)
+
+# 生理状态中参与数值计算的字段，按此顺序打包为 ndarray
+PHYS_KEYS = ('energy_level', 'stress_level', 'social_energy', 'fatigue', 'hunger')
+
+# 情绪衰减率（每次时间更新向中性值回归，每天约1%）
+DECAY_RATE = 0.995
+
+# 时间规则中用到的基础情绪下标
+_ANTICIPATION = EMO_IDX['anticipation']
+_CALM = EMO_IDX['calm']
+_JOY = EMO_IDX['joy']
+
+
+def _build_time_state():
+    """
+    预先计算每个 (小时, 星期) 的时间更新参数
+    
+    返回:
+        (基础情绪变化向量表, 生理参数表)，按 [hour, weekday] 索引；
+        生理参数依次为 (精力系数, 疲劳增量, 饥饿增量, 压力增量)
+    """
+    base_delta = np.zeros((24, 7, len(EMOTION_KEYS)), dtype=np.float32)
+    phys_params = np.zeros((24, 7, 4), dtype=np.float64)
+    
+    for hour in range(24):
+        # 基于时间的精力变化
+        if hour >= 22 or hour < 6:  # 深夜
+            energy_factor, fatigue_add = 0.8, 5
+        elif 13 <= hour < 15:  # 午后
+            energy_factor, fatigue_add = 0.9, 2
+        else:
+            energy_factor, fatigue_add = 1.0, 0
+        
+        # 饥饿度随时间增加
+        if 7 <= hour < 9:  # 早餐时间
+            hunger_add = 20
+        elif 11 <= hour < 13:  # 午餐时间
+            hunger_add = 30
+        elif 17 <= hour < 19:  # 晚餐时间
+            hunger_add = 25
+        else:
+            hunger_add = 0
+        
+        # 昼夜节律对情绪的影响
+        if 6 <= hour < 9:  # 清晨
+            base_delta[hour, :, _ANTICIPATION] = 0.5
+        elif hour >= 21:  # 夜晚
+            base_delta[hour, :, _CALM] = 1
+            base_delta[hour, :, _JOY] = -0.3
+        
+        for weekday in range(7):
+            # 工作日压力累积，周末缓解
+            stress_add = 0.1 if weekday < 5 else -0.5
+            phys_params[hour, weekday] = (energy_factor, fatigue_add, hunger_add, stress_add)
+    
+    return base_delta, phys_params
+
+
+TIME_BASE_DELTA, TIME_PHYS_PARAMS = _build_time_state()
+
+
+@njit(cache=True, fastmath=True)
+def _tick_kernel(base, phys, base_delta, phys_params, hours_since_meal):
+    """
+    每次时间更新的数值部分，原地修改 base（基础情绪）和 phys（生理状态，顺序见 PHYS_KEYS）
+    
+    base_delta / phys_params 为 TIME_BASE_DELTA / TIME_PHYS_PARAMS 中当前时间对应的一行；
+    hours_since_meal 为负表示没有进餐记录
+    """
+    # 生理状态先读到局部变量中计算，最后统一写回
+    energy, stress, social, fatigue, hunger = phys[0], phys[1], phys[2], phys[3], phys[4]
+    
+    energy *= phys_params[0]
+    fatigue += phys_params[1]
+    hunger += phys_params[2]
+    stress += phys_params[3]
+    
+    # 进餐后重置饥饿度
+    if 0 <= hours_since_meal < 2:
+        hunger = 0.0 if hunger < 40 else hunger - 40
+    
+    # 社交能量衰减
+    social = 0.0 if social < 0.2 else social - 0.2
+    
+    # 限制范围并写回
+    phys[0] = 0.0 if energy < 0 else 100.0 if energy > 100 else energy
+    phys[1] = 0.0 if stress < 0 else 100.0 if stress > 100 else stress
+    phys[2] = 0.0 if social < 0 else 100.0 if social > 100 else social
+    phys[3] = 0.0 if fatigue < 0 else 100.0 if fatigue > 100 else fatigue
+    phys[4] = 0.0 if hunger < 0 else 100.0 if hunger > 100 else hunger
+    
+    # 应用昼夜节律，再缓慢向中性值回归
+    for i in range(base.shape[0]):
+        value = base[i] + base_delta[i]
+        value = 0.0 if value < 0 else 100.0 if value > 100 else value
+        value = value * DECAY_RATE + NEUTRAL[i] * (1 - DECAY_RATE)
+        base[i] = 0.0 if value < 0 else 100.0 if value > 100 else value
+
+# 主导基础情绪 -> 情绪名称
+EMOTION_MAP = {
+    'joy': 'happy',
+    'trust': 'content',
+    'fear': 'anxious',
+    'surprise': 'surprised',
+    'sadness': 'sad',
+    'disgust': 'disgusted',
+    'anger': 'angry',
+    'anticipation': 'expectant'
+}
+
+# 决定效价正负的情绪分组
+POSITIVE = frozenset({'joy', 'trust', 'surprise', 'anticipation'})
+NEGATIVE = frozenset({'fear', 'sadness', 'disgust', 'anger'})
+
+# 情绪历史中的一条记录（元组，比字典省内存）；对外返回时转为字典
+MoodSnapshot = namedtuple('MoodSnapshot', 'name intensity valence arousal dominance timestamp')
+
+# 情感记忆中的一条事件（只记录事件本身和当时情绪的关键值）；保存时转为字典
+EventMemory = namedtuple('EventMemory', 'event_type data mood_name valence arousal intensity ts')
+
+
+def _event_to_dict(event: EventMemory) -> Dict[str, Any]:
+    """将情感记忆事件展开为保存用的字典格式"""
+    return {
+        'event_type': event.event_type,
+        'event_data': event.data,
+        'emotional_state': {
+            'name': event.mood_name,
+            'valence': event.valence,
+            'arousal': event.arousal
+        },
+        'timestamp': event.ts,
+        'intensity': event.intensity
+    }
+
+
+def _event_from_dict(entry: Dict[str, Any]) -> EventMemory:
+    """从保存的字典格式还原情感记忆事件"""
+    mood = entry.get('emotional_state', {})
+    return EventMemory(
+        entry.get('event_type'), entry.get('event_data', {}),
+        mood.get('name', 'neutral'), mood.get('valence', 0.0), mood.get('arousal', 0.5),
+        entry.get('intensity', 50), entry.get('timestamp')
+    )
+
+# 响应风格：按效价分三档，再按情绪名称覆盖部分字段（只读，使用时合并出新字典）
+_STYLE_POSITIVE = {
+    'tone': 'warm',
+    'verbosity': 'moderate',
+    'emoji_frequency': 'high',
+    'response_speed': 'fast'
+}
+_STYLE_NEGATIVE = {
+    'tone': 'cool',
+    'verbosity': 'low',
+    'emoji_frequency': 'low',
+    'response_speed': 'slow'
+}
+_STYLE_NEUTRAL = {
+    'tone': 'neutral',
+    'verbosity': 'moderate',
+    'emoji_frequency': 'medium',
+    'response_speed': 'normal'
+}
+_STYLE_OVERRIDES = {
+    'happy': {'tone': 'cheerful', 'emoji_frequency': 'very_high'},
+    'sad': {'tone': 'gentle', 'response_speed': 'very_slow'}
+}
+
 class EmotionSystem:
     """情感系统 - 管理情绪状态和情感反应"""
     
@@ -29,36 +245,70 @@ class EmotionSystem:
         # 加载情感配置
         self.emotion_config = self.config.get('emotion', {})
         
-        # 初始化情感状态
+        # 初始化情感状态（基础情绪单独存为 ndarray，顺序见 EMOTION_KEYS）
+        # 基础情绪的总和与最大值下标随每次修改更新（见 _base_changed）
+        self._base = INITIAL_BASE.copy()
+        self._base_changed()
         self.emotional_state = self._initialize_emotional_state()
         
         # 加载历史状态
         self._load_historical_state()
         
-        # 情绪变化记录
-        self.mood_history = []
+        # 当前情绪的只读视图（随状态更新），供内部只读的调用方使用，避免复制
+        self._mood_proxy = MappingProxyType(self.emotional_state['current_mood'])
+        
+        # 情绪开始时间和最后进餐时间只在初始化/加载时写入，解析一次后缓存
+        last_meal = self.emotional_state['physiological']['last_meal']
+        self._mood_start_dt = datetime.fromisoformat(self.emotional_state['current_mood']['start_time'])
+        self._last_meal_dt = datetime.fromisoformat(last_meal) if last_meal else None
+        
+        # 情感记忆中的事件改用定长队列，超出长度自动丢弃最旧的（加载的历史是字典列表）
+        memory = self.emotional_state['memory']
+        memory['recent_events'] = deque(map(_event_from_dict, memory['recent_events']), maxlen=20)
+        memory['significant_moments'] = deque(map(_event_from_dict, memory['significant_moments']), maxlen=10)
+        
+        # 情绪变化记录（定长队列），_mood_ts 与之一一对应，保存各条记录的时间戳，用于按时间截取
         self.max_history_length = 100
+        self.mood_history = deque(maxlen=self.max_history_length)
+        self._mood_ts = deque(maxlen=self.max_history_length)
         
-        # 情感触发器
+        # 情感触发器，以及按事件类型直接查找的扁平索引
         self.emotion_triggers = self._load_emotion_triggers()
+        self._trigger_index = {
+            name: trigger
+            for category in self.emotion_triggers.values()
+            for name, trigger in category.items()
+        }
+        
+        # 随机数缓冲：一次生成一批，概率判断时逐个取用
+        self._rng = np.random.default_rng()
+        self._rand_buf = deque()
+        
+        # 保存节流：状态有变化且距上次保存超过间隔才写文件；
+        # 停用和保存全部状态时由意识核心以 force=True 调用，立即写出
+        self._dirty = False
+        self._last_save_ts = float('-inf')
+        self.save_interval = 30  # 秒
+        
+        # 每次保存都写二进制快照，可读的 JSON 每隔若干次（以及强制保存时）写一次
+        self._save_count = 0
+        self.json_snapshot_every = 10
+        
+        # 状态锁：保存可能在线程池中进行，修改状态和生成保存快照都要持有它
+        self._state_lock = threading.RLock()
+        
+        # 状态版本号：每次状态变化后递增，get_current_mood/get_status 的结果按版本缓存
+        self._state_version = 0
+        self._cached_mood_ver = -1
+        self._cached_mood = None
+        self._cached_status_ver = -1
+        self._cached_status = None
         
         self.logger.info("情感系统初始化完成")
         self.logger.info(f"当前情绪: {self.emotional_state['current_mood']['name']}")
     
     def _initialize_emotional_state(self) -> Dict[str, Any]:
-        """初始化情感状态"""
-        # 基础情感维度 (Plutchik的情感轮)
-        base_emotions = {
-            'joy': 60.0,        # 喜悦
-            'trust': 50.0,      # 信任
-            'fear': 20.0,       # 恐惧
-            'surprise': 30.0,   # 惊讶
-            'sadness': 25.0,    # 悲伤
-            'disgust': 10.0,    # 厌恶
-            'anger': 15.0,      # 愤怒
-            'anticipation': 40.0  # 期待
-        }
-        
+        """初始化情感状态（基础情绪不在其中，见 self._base）"""
         # 当前主要情绪
         current_mood = {
             'name': 'calm',           # 情绪名称
@@ -97,7 +347,6 @@ class EmotionSystem:
         }
         
         return {
-            'base_emotions': base_emotions,
             'current_mood': current_mood,
             'physiological': physiological_state,
             'needs': emotional_needs,
@@ -113,12 +362,8 @@ class EmotionSystem:
             emotion_dir = data_path / "emotion"
             emotion_dir.mkdir(parents=True, exist_ok=True)
             
-            state_file = emotion_dir / "emotional_state.json"
-            
-            if state_file.exists():
-                with open(state_file, 'r', encoding='utf-8') as f:
-                    saved_state = json.load(f)
-                
+            saved_state = self._read_saved_state(emotion_dir)
+            if saved_state:
                 # 合并状态，但保持一些动态值
                 for key in ['current_mood', 'physiological', 'needs', 'memory']:
                     if key in saved_state:
@@ -131,18 +376,44 @@ class EmotionSystem:
                 # 更新基础情绪（缓慢变化）
                 if 'base_emotions' in saved_state:
                     for emotion, value in saved_state['base_emotions'].items():
-                        if emotion in self.emotional_state['base_emotions']:
+                        idx = EMO_IDX.get(emotion)
+                        if idx is not None:
                             # 逐渐向保存的值调整
-                            current = self.emotional_state['base_emotions'][emotion]
-                            self.emotional_state['base_emotions'][emotion] = (
-                                current * 0.3 + value * 0.7
-                            )
+                            self._base[idx] = self._base[idx] * 0.3 + value * 0.7
+                    self._base_changed()
                 
                 self.logger.info("情感状态已从历史加载")
                 
         except Exception as e:
             self.logger.warning(f"加载情感历史状态失败: {e}")
     
+    def _read_saved_state(self, emotion_dir: Path) -> Optional[Dict[str, Any]]:
+        """读取保存的状态：优先读取不旧于 JSON 的二进制快照，读取失败时退回 JSON"""
+        snapshot_file = emotion_dir / "state.pkl.gz"
+        json_file = emotion_dir / "emotional_state.json"
+        
+        if snapshot_file.exists() and (
+            not json_file.exists() or snapshot_file.stat().st_mtime >= json_file.stat().st_mtime
+        ):
+            try:
+                return pickle.loads(gzip.decompress(snapshot_file.read_bytes()))
+            except Exception as e:
+                self.logger.warning(f"读取情感状态快照失败，改用JSON: {e}")
+        
+        if json_file.exists():
+            return _json_loads(json_file.read_bytes())
+        return None
+    
+    def _base_changed(self):
+        """基础情绪被修改后调用，更新总和与主导情绪下标"""
+        self._base_sum = float(self._base.sum())
+        self._base_argmax = int(self._base.argmax())
+    
+    @property
+    def base_emotions(self) -> Dict[str, float]:
+        """基础情绪的字典视图（用于序列化和展示）"""
+        return dict(zip(EMOTION_KEYS, self._base.tolist()))
+    
     def _load_emotion_triggers(self) -> Dict[str, Dict]:
         """加载情感触发器"""
         triggers = {
@@ -219,86 +490,54 @@ class EmotionSystem:
             }
         }
         
+        # 预先把每个触发器的情绪影响编译成与 EMOTION_KEYS 对齐的变化向量
+        for category in triggers.values():
+            for trigger in category.values():
+                affected = trigger.get('affected_emotions', {})
+                trigger['_delta'] = np.array([affected.get(key, 0) for key in EMOTION_KEYS], dtype=np.int8)
+        
         return triggers
     
     def update_based_on_time(self, current_time: datetime):
-        """基于时间更新情感状态"""
-        hour = current_time.hour
-        weekday = current_time.weekday()  # 0=周一, 6=周日
-        
-        # 更新时间相关状态
-        self._update_physiological_state(hour, weekday)
-        self._update_circadian_rhythm(hour)
-        self._update_mood_duration(current_time)
-        
-        # 记录情绪历史
-        self._record_mood_history()
-        
-        # 自然情绪衰减
-        self._apply_emotional_decay()
-        
-        # 重新计算当前情绪
-        self._recalculate_current_mood()
+        """基于时间更新情感状态（整个更新过程只使用传入的 current_time）"""
+        with self._state_lock:
+            # 更新时间相关状态（生理状态、昼夜节律、自然情绪衰减）
+            self._apply_time_tick(current_time)
+            self._update_mood_duration(current_time)
+            
+            # 记录情绪历史
+            self._record_mood_history(current_time)
+            
+            # 重新计算当前情绪
+            self._recalculate_current_mood()
+            self._dirty = True
+            self._state_version += 1
     
-    def _update_physiological_state(self, hour: int, weekday: int):
-        """更新生理状态"""
+    def _apply_time_tick(self, now: datetime):
+        """更新生理状态、昼夜节律并应用情绪衰减（数值计算在 _tick_kernel 中完成）"""
         physiological = self.emotional_state['physiological']
+        phys = np.array([physiological[key] for key in PHYS_KEYS], dtype=np.float64)
         
-        # 基于时间的精力变化
-        if 22 <= hour or hour < 6:  # 深夜
-            physiological['energy_level'] *= 0.8
-            physiological['fatigue'] += 5
-        elif 13 <= hour < 15:  # 午后
-            physiological['energy_level'] *= 0.9
-            physiological['fatigue'] += 2
-        
-        # 饥饿度随时间增加
-        if 7 <= hour < 9:  # 早餐时间
-            physiological['hunger'] += 20
-        elif 11 <= hour < 13:  # 午餐时间
-            physiological['hunger'] += 30
-        elif 17 <= hour < 19:  # 晚餐时间
-            physiological['hunger'] += 25
-        
-        # 进餐后重置饥饿度
-        if physiological['last_meal']:
-            last_meal_time = datetime.fromisoformat(physiological['last_meal'])
-            hours_since_meal = (datetime.now() - last_meal_time).total_seconds() / 3600
-            
-            if hours_since_meal < 2:
-                physiological['hunger'] = max(0, physiological['hunger'] - 40)
-        
-        # 工作日压力
-        if weekday < 5:  # 工作日
-            physiological['stress_level'] += 0.1
-        else:  # 周末
-            physiological['stress_level'] = max(0, physiological['stress_level'] - 0.5)
+        # 距离上次进餐的小时数，没有进餐记录时传 -1
+        hours_since_meal = -1.0
+        if self._last_meal_dt is not None:
+            hours_since_meal = (now - self._last_meal_dt).total_seconds() / 3600
         
-        # 社交能量衰减
-        physiological['social_energy'] = max(0, physiological['social_energy'] - 0.2)
+        # 按 (小时, 星期) 取预先计算好的时间参数，weekday: 0=周一, 6=周日
+        hour, weekday = now.hour, now.weekday()
+        _tick_kernel(self._base, phys, TIME_BASE_DELTA[hour, weekday],
+                     TIME_PHYS_PARAMS[hour, weekday], hours_since_meal)
         
-        # 限制范围
-        for key in ['energy_level', 'stress_level', 'social_energy', 'fatigue', 'hunger']:
-            physiological[key] = max(0, min(100, physiological[key]))
-    
-    def _update_circadian_rhythm(self, hour: int):
-        """更新昼夜节律"""
-        # 昼夜节律对情绪的影响
-        if 6 <= hour < 9:  # 清晨
-            self.emotional_state['base_emotions']['anticipation'] += 0.5
-        elif 21 <= hour < 24:  # 夜晚
-            self.emotional_state['base_emotions']['calm'] = min(100, 
-                self.emotional_state['base_emotions'].get('calm', 50) + 1)
-            self.emotional_state['base_emotions']['joy'] = max(0,
-                self.emotional_state['base_emotions']['joy'] - 0.3)
+        for key, value in zip(PHYS_KEYS, phys.tolist()):
+            physiological[key] = value
+        self._base_changed()
     
     def _update_mood_duration(self, current_time: datetime):
         """更新情绪持续时间"""
         mood = self.emotional_state['current_mood']
         
-        if mood['start_time']:
-            start_time = datetime.fromisoformat(mood['start_time'])
-            duration_minutes = (current_time - start_time).total_seconds() / 60
+        if self._mood_start_dt is not None:
+            duration_minutes = (current_time - self._mood_start_dt).total_seconds() / 60
             mood['duration'] = duration_minutes
             
             # 情绪自然衰减（长时间持续会减弱）
@@ -309,54 +548,26 @@ class EmotionSystem:
         # 限制强度范围
         mood['intensity'] = max(0, min(100, mood['intensity']))
     
-    def _record_mood_history(self):
+    def _record_mood_history(self, now: datetime):
         """记录情绪历史"""
-        current_mood = self.emotional_state['current_mood'].copy()
-        current_mood['timestamp'] = datetime.now().isoformat()
-        
-        self.mood_history.append(current_mood)
-        
-        # 保持历史记录长度
-        if len(self.mood_history) > self.max_history_length:
-            self.mood_history = self.mood_history[-self.max_history_length:]
-    
-    def _apply_emotional_decay(self):
-        """应用情绪衰减"""
-        # 基础情绪趋向中性值
-        neutral_values = {
-            'joy': 50, 'trust': 50, 'fear': 20, 'surprise': 30,
-            'sadness': 25, 'disgust': 10, 'anger': 15, 'anticipation': 40
-        }
-        
-        for emotion, current_value in self.emotional_state['base_emotions'].items():
-            neutral = neutral_values.get(emotion, 50)
-            # 缓慢向中性值回归
-            decay_rate = 0.995  # 每天衰减约1%
-            new_value = current_value * decay_rate + neutral * (1 - decay_rate)
-            self.emotional_state['base_emotions'][emotion] = new_value
+        mood = self.emotional_state['current_mood']
+        self.mood_history.append(MoodSnapshot(
+            mood['name'], mood['intensity'], mood['valence'],
+            mood['arousal'], mood['dominance'], now.isoformat()
+        ))
+        self._mood_ts.append(now.timestamp())
     
     def _recalculate_current_mood(self):
         """重新计算当前主要情绪"""
-        base_emotions = self.emotional_state['base_emotions']
         physiological = self.emotional_state['physiological']
         
         # 找出最强的情绪
-        dominant_emotion = max(base_emotions.items(), key=lambda x: x[1])
-        emotion_name, emotion_value = dominant_emotion
+        idx = self._base_argmax
+        emotion_name = EMOTION_KEYS[idx]
+        emotion_value = float(self._base[idx])
         
         # 映射到情绪名称
-        emotion_map = {
-            'joy': 'happy',
-            'trust': 'content',
-            'fear': 'anxious',
-            'surprise': 'surprised',
-            'sadness': 'sad',
-            'disgust': 'disgusted',
-            'anger': 'angry',
-            'anticipation': 'expectant'
-        }
-        
-        mood_name = emotion_map.get(emotion_name, 'neutral')
+        mood_name = EMOTION_MAP.get(emotion_name, 'neutral')
         
         # 计算情绪强度（基于基础情绪值和生理状态）
         base_intensity = emotion_value
@@ -370,12 +581,9 @@ class EmotionSystem:
         intensity = base_intensity * physiological_modifier
         
         # 计算效价（积极/消极）
-        positive_emotions = {'joy', 'trust', 'surprise', 'anticipation'}
-        negative_emotions = {'fear', 'sadness', 'disgust', 'anger'}
-        
-        if emotion_name in positive_emotions:
+        if emotion_name in POSITIVE:
             valence = 0.3 + (emotion_value / 100) * 0.7
-        elif emotion_name in negative_emotions:
+        elif emotion_name in NEGATIVE:
             valence = -0.3 - (emotion_value / 100) * 0.7
         else:
             valence = 0.0
@@ -397,28 +605,27 @@ class EmotionSystem:
     def process_event(self, event_type: str, event_data: Dict[str, Any]):
         """处理事件，更新情感"""
         self.logger.info(f"处理情感事件: {event_type}")
+        now = datetime.now()
         
-        # 查找对应的触发器
-        trigger = None
-        for category in self.emotion_triggers.values():
-            if event_type in category:
-                trigger = category[event_type]
-                break
-        
-        if trigger:
-            self._apply_emotion_trigger(event_type, trigger, event_data)
-        
-        # 更新情感需求
-        self._update_emotional_needs(event_type, event_data)
-        
-        # 记录到情感记忆
-        self._record_emotional_memory(event_type, event_data)
-        
-        # 立即重新计算情绪
-        self._recalculate_current_mood()
-        
-        # 记录情绪变化
-        self._record_mood_history()
+        with self._state_lock:
+            # 查找对应的触发器
+            trigger = self._trigger_index.get(event_type)
+            if trigger:
+                self._apply_emotion_trigger(event_type, trigger, event_data)
+            
+            # 更新情感需求
+            self._update_emotional_needs(event_type, event_data)
+            
+            # 记录到情感记忆
+            self._record_emotional_memory(event_type, event_data, now)
+            
+            # 立即重新计算情绪
+            self._recalculate_current_mood()
+            
+            # 记录情绪变化
+            self._record_mood_history(now)
+            self._dirty = True
+            self._state_version += 1
     
     def _apply_emotion_trigger(self, event_type: str, trigger: Dict, event_data: Dict):
         """应用情感触发器"""
@@ -426,14 +633,10 @@ class EmotionSystem:
         intensity = trigger.get('intensity', 0.5)
         duration = trigger.get('duration', 60)
         
-        # 应用情绪影响
-        for emotion, change in affected_emotions.items():
-            current_value = self.emotional_state['base_emotions'].get(emotion, 50)
-            new_value = current_value + change * intensity
-            
-            # 限制范围
-            new_value = max(0, min(100, new_value))
-            self.emotional_state['base_emotions'][emotion] = new_value
+        # 应用情绪影响：使用加载时编译好的变化向量，原地加到基础情绪上并限制范围
+        self._base += trigger['_delta'] * np.float32(intensity)
+        np.clip(self._base, 0, 100, out=self._base)
+        self._base_changed()
         
         # 如果是时间相关触发器，更新生理状态
         if trigger.get('time_based', False):
@@ -472,30 +675,20 @@ class EmotionSystem:
         for need in needs:
             needs[need] = min(100, needs[need] + 0.1)
     
-    def _record_emotional_memory(self, event_type: str, event_data: Dict):
+    def _record_emotional_memory(self, event_type: str, event_data: Dict, now: datetime):
         """记录情感记忆"""
-        memory_entry = {
-            'event_type': event_type,
-            'event_data': event_data,
-            'emotional_state': self.get_current_mood(),
-            'timestamp': datetime.now().isoformat(),
-            'intensity': self._calculate_event_intensity(event_type, event_data)
-        }
+        mood = self.emotional_state['current_mood']
+        memory_entry = EventMemory(
+            event_type, event_data, mood['name'], mood['valence'], mood['arousal'],
+            self._calculate_event_intensity(event_type, event_data), now.isoformat()
+        )
         
+        # 定长队列，只保留最近20条事件
         self.emotional_state['memory']['recent_events'].append(memory_entry)
         
-        # 保持最近事件数量
-        if len(self.emotional_state['memory']['recent_events']) > 20:
-            self.emotional_state['memory']['recent_events'] = \
-                self.emotional_state['memory']['recent_events'][-20:]
-        
-        # 如果是高强度事件，记录为重要时刻
-        if memory_entry['intensity'] > 70:
+        # 如果是高强度事件，记录为重要时刻（只保留最近10条）
+        if memory_entry.intensity > 70:
             self.emotional_state['memory']['significant_moments'].append(memory_entry)
-            
-            if len(self.emotional_state['memory']['significant_moments']) > 10:
-                self.emotional_state['memory']['significant_moments'] = \
-                    self.emotional_state['memory']['significant_moments'][-10:]
     
     def _calculate_event_intensity(self, event_type: str, event_data: Dict) -> float:
         """计算事件强度"""
@@ -519,7 +712,10 @@ class EmotionSystem:
         return min(100, intensity)
     
     def get_current_mood(self) -> Dict[str, Any]:
-        """获取当前情绪状态"""
+        """获取当前情绪状态（状态未变化时复用缓存，返回其浅拷贝；只读的调用方可用 get_current_mood_view）"""
+        if self._cached_mood_ver == self._state_version:
+            return dict(self._cached_mood)
+        
         mood = self.emotional_state['current_mood'].copy()
         
         # 添加额外信息
@@ -527,28 +723,43 @@ class EmotionSystem:
             'physiological_state': self.emotional_state['physiological'],
             'emotional_needs': self.emotional_state['needs'],
             'base_emotions_summary': {
-                'dominant': max(self.emotional_state['base_emotions'].items(), key=lambda x: x[1])[0],
-                'average_intensity': sum(self.emotional_state['base_emotions'].values()) / 
-                                     len(self.emotional_state['base_emotions'])
+                'dominant': EMOTION_KEYS[self._base_argmax],
+                'average_intensity': self._base_sum / len(EMOTION_KEYS)
             }
         })
         
-        return mood
+        self._cached_mood = mood
+        self._cached_mood_ver = self._state_version
+        return dict(mood)
+    
+    def get_current_mood_view(self) -> MappingProxyType:
+        """获取当前情绪的只读视图（不复制，内容随情绪更新而变化）"""
+        return self._mood_proxy
     
     def get_mood_trend(self, hours: int = 24) -> List[Dict]:
         """获取情绪趋势"""
         if not self.mood_history:
             return []
         
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        
-        trend = []
-        for mood_entry in self.mood_history:
-            timestamp = datetime.fromisoformat(mood_entry['timestamp'])
-            if timestamp >= cutoff_time:
-                trend.append(mood_entry)
+        cutoff = (datetime.now() - timedelta(hours=hours)).timestamp()
         
-        return trend
+        # 历史按时间顺序追加，从最新一端往回数到截止时间为止，只访问时间范围内的记录
+        with self._state_lock:
+            count = 0
+            for ts in reversed(self._mood_ts):
+                if ts < cutoff:
+                    break
+                count += 1
+            
+            recent = list(itertools.islice(reversed(self.mood_history), count))
+        recent.reverse()
+        return [snapshot._asdict() for snapshot in recent]
+    
+    def _rand(self) -> float:
+        """取一个 [0, 1) 随机数，缓冲用完时一次补充1024个"""
+        if not self._rand_buf:
+            self._rand_buf.extend(self._rng.random(1024).tolist())
+        return self._rand_buf.popleft()
     
     def should_express_emotion(self, emotion_type: str) -> bool:
         """判断是否应该表达某种情绪"""
@@ -559,19 +770,19 @@ class EmotionSystem:
             # 需要表达关爱时
             return (current_mood['valence'] > 0.4 and 
                     needs['need_affection'] < 60 and
-                    random.random() < 0.7)
+                    self._rand() < 0.7)
         
         elif emotion_type == 'annoyance':
             # 需要表达不满时
             return (current_mood['valence'] < -0.2 and
                     needs['need_attention'] > 70 and
-                    random.random() < 0.4)
+                    self._rand() < 0.4)
         
         elif emotion_type == 'excitement':
             # 需要表达兴奋时
             return (current_mood['arousal'] > 0.6 and
                     current_mood['valence'] > 0.5 and
-                    random.random() < 0.6)
+                    self._rand() < 0.6)
         
         return False
     
@@ -579,72 +790,83 @@ class EmotionSystem:
         """获取情感响应风格"""
         mood = self.emotional_state['current_mood']
         
-        # 基于情绪决定响应风格
-        if mood['valence'] > 0.5:
-            style = {
-                'tone': 'warm',
-                'verbosity': 'moderate',
-                'emoji_frequency': 'high',
-                'response_speed': 'fast',
-                'segmentation': True if mood['arousal'] > 0.6 else False
-            }
-        elif mood['valence'] < -0.3:
-            style = {
-                'tone': 'cool',
-                'verbosity': 'low',
-                'emoji_frequency': 'low',
-                'response_speed': 'slow',
-                'segmentation': False
-            }
-        else:
-            style = {
-                'tone': 'neutral',
-                'verbosity': 'moderate',
-                'emoji_frequency': 'medium',
-                'response_speed': 'normal',
-                'segmentation': False
-            }
+        # 基于情绪效价选择基础风格，再叠加情绪特定的修饰
+        valence = mood['valence']
+        base = _STYLE_POSITIVE if valence > 0.5 else _STYLE_NEGATIVE if valence < -0.3 else _STYLE_NEUTRAL
         
-        # 添加情绪特定的修饰
-        if mood['name'] == 'happy':
-            style['tone'] = 'cheerful'
-            style['emoji_frequency'] = 'very_high'
-        elif mood['name'] == 'sad':
-            style['tone'] = 'gentle'
-            style['response_speed'] = 'very_slow'
+        return {
+            **base,
+            **_STYLE_OVERRIDES.get(mood['name'], {}),
+            'segmentation': base is _STYLE_POSITIVE and mood['arousal'] > 0.6
+        }
+    
+    def _serialize_state(self, force: bool) -> List[tuple]:
+        """生成本次保存要写入的 (文件名, 内容) 列表，调用方需持有状态锁"""
+        # 不保存瞬时状态（只改副本，不影响运行中的当前情绪）
+        save_state = self.emotional_state.copy()
+        save_state['base_emotions'] = self.base_emotions
+        memory = save_state['memory']
+        save_state['memory'] = {
+            **memory,
+            'recent_events': list(map(_event_to_dict, memory['recent_events'])),
+            'significant_moments': list(map(_event_to_dict, memory['significant_moments']))
+        }
+        save_state['current_mood'] = {
+            **save_state['current_mood'],
+            'start_time': datetime.now().isoformat(),
+            'duration': 0
+        }
         
-        return style
+        files = []
+        self._save_count += 1
+        if force or self._save_count % self.json_snapshot_every == 0:
+            # 情绪历史只保存最近50条
+            recent_history = itertools.islice(
+                self.mood_history, max(0, len(self.mood_history) - 50), None
+            )
+            files.append(("emotional_state.json", _json_bytes(save_state)))
+            files.append(("mood_history.json", _json_bytes([s._asdict() for s in recent_history])))
+        
+        # 二进制快照最后写，保证它不旧于 JSON，加载时优先使用
+        snapshot = pickle.dumps(save_state, pickle.HIGHEST_PROTOCOL)
+        files.append(("state.pkl.gz", gzip.compress(snapshot, compresslevel=1)))
+        return files
     
-    def save_state(self):
-        """保存情感状态"""
+    def save_state(self, force: bool = False):
+        """保存情感状态；没有变化或未到保存间隔时跳过，force 为 True 时立即保存"""
+        if not force and (not self._dirty or time.monotonic() - self._last_save_ts < self.save_interval):
+            return
+        
         try:
             data_path = Path(self.config.get('env.system.data_path', './data'))
             emotion_dir = data_path / "emotion"
             emotion_dir.mkdir(parents=True, exist_ok=True)
             
-            # 保存当前状态
-            state_file = emotion_dir / "emotional_state.json"
-            with open(state_file, 'w', encoding='utf-8') as f:
-                # 不保存瞬时状态
-                save_state = self.emotional_state.copy()
-                save_state['current_mood']['start_time'] = datetime.now().isoformat()
-                save_state['current_mood']['duration'] = 0
-                
-                json.dump(save_state, f, ensure_ascii=False, indent=2)
+            # 在锁内生成全部待写内容，写文件时不再访问活动状态
+            with self._state_lock:
+                files = self._serialize_state(force)
+                self._dirty = False
             
-            # 保存情绪历史
-            history_file = emotion_dir / "mood_history.json"
-            with open(history_file, 'w', encoding='utf-8') as f:
-                json.dump(self.mood_history[-50:], f, ensure_ascii=False, indent=2)
+            # 先写临时文件再替换，写入中途出错不会损坏原文件
+            for filename, payload in files:
+                path = emotion_dir / filename
+                tmp_path = path.with_name(filename + ".tmp")
+                tmp_path.write_bytes(payload)
+                os.replace(tmp_path, path)
             
+            self._last_save_ts = time.monotonic()
             self.logger.debug("情感状态已保存")
             
         except Exception as e:
+            self._dirty = True
             self.logger.error(f"保存情感状态失败: {e}")
     
     def get_status(self) -> Dict[str, Any]:
-        """获取状态信息"""
-        return {
+        """获取状态信息（状态未变化时复用缓存，返回其浅拷贝）"""
+        if self._cached_status_ver == self._state_version:
+            return dict(self._cached_status)
+        
+        status = {
             'current_mood': self.emotional_state['current_mood'],
             'physiological': {
                 'energy': self.emotional_state['physiological']['energy_level'],
@@ -654,4 +876,8 @@ class EmotionSystem:
             'needs': self.emotional_state['needs'],
             'stability': self.emotional_state['stability'],
             'history_length': len(self.mood_history)
-        }
\ No newline at end of file
+        }
+        
+        self._cached_status = status
+        self._cached_status_ver = self._state_version
+        return dict(status)
\ No newline at end of file
@@ -6,13 +6,155 @@
 参考：The Sims的生活模拟系统
 """
 
+import bisect
 import json
-import random
+import os
+import threading
+import time
+from collections import deque
 from datetime import datetime, date, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 import logging
 from pathlib import Path
-import calendar
+
+import numpy as np
+
+try:
+    import orjson
+    
+    _json_loads = orjson.loads
+    
+    def _json_bytes(obj: Any) -> bytes:
+        """序列化为带缩进的UTF-8 JSON字节"""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    _json_loads = json.loads
+    
+    def _json_bytes(obj: Any) -> bytes:
+        """序列化为带缩进的UTF-8 JSON字节"""
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    
+    def njit(*args, **kwargs):
+        """未安装 numba 时的替代装饰器，直接使用 Python 版本"""
+        def decorator(func):
+            return func
+        return decorator
+
+# 活动分组：不适合主动发起对话的活动、消耗社交电量的活动、恢复社交电量的活动
+BUSY_ACTIVITIES = frozenset({'working', 'sleeping', 'commuting', 'eating'})
+SOCIAL_DRAIN = frozenset({'socializing', 'working'})
+SOCIAL_RECOVER = frozenset({'leisure', 'sleeping'})
+
+# 当前活动对时间状态的影响分类，_tick_update 中按整数编号判断
+ACT_OTHER = 0
+ACT_SOCIAL_DRAIN = 1    # 社交活动消耗社交电量
+ACT_SOCIAL_RECOVER = 2  # 独处时恢复
+ACT_HOBBY = 3           # 进行爱好活动时消耗爱好能量
+ACTIVITY_IDS = {
+    **dict.fromkeys(SOCIAL_DRAIN, ACT_SOCIAL_DRAIN),
+    **dict.fromkeys(SOCIAL_RECOVER, ACT_SOCIAL_RECOVER),
+    'hobby': ACT_HOBBY
+}
+
+
+@njit(cache=True)
+def _tick_update(state, hour, is_weekend, activity_id):
+    """
+    每次更新时间相关状态的数值部分，原地修改 state（能量储备, 社交电量, 爱好能量）
+    """
+    energy, battery, hobby = state[0], state[1], state[2]
+    
+    # 夜晚恢复能量
+    if hour >= 23 or hour < 7:
+        energy = min(100.0, energy + 0.5)
+    # 白天消耗能量
+    elif 9 <= hour < 18 and not is_weekend:
+        energy = max(0.0, energy - 0.3)
+    
+    # 更新社交电量
+    if activity_id == ACT_SOCIAL_DRAIN:
+        battery = max(0.0, battery - 0.2)
+    elif activity_id == ACT_SOCIAL_RECOVER:
+        battery = min(100.0, battery + 0.3)
+    
+    # 更新爱好能量：进行爱好活动时消耗，其他时间恢复
+    if activity_id == ACT_HOBBY:
+        hobby = max(0.0, hobby - 0.5)
+    else:
+        hobby = min(100.0, hobby + 0.1)
+    
+    state[0], state[1], state[2] = energy, battery, hobby
+
+
+def _hhmm_to_minutes(hhmm: str) -> int:
+    """将 'HH:MM' 转为当天的分钟数"""
+    hour, minute = hhmm.split(':')
+    return int(hour) * 60 + int(minute)
+
+
+def _mmdd_to_int(mmdd: Optional[str]) -> Optional[int]:
+    """将 'MMDD' 转为整数 (月*100+日)，空值或格式不符（如 '02-14'）时返回 None"""
+    if not mmdd:
+        return None
+    if isinstance(mmdd, str) and mmdd.isascii() and mmdd.isdigit() and len(mmdd) == 4:
+        return int(mmdd)
+    logging.getLogger("LifeSimulator").warning(f"特殊日期格式无效，应为 MMDD: {mmdd!r}")
+    return None
+
+# 用餐时间（分钟数）对应的餐名
+MEAL_NAMES = {480: 'breakfast', 750: 'lunch', 1140: 'dinner'}
+
+# 作息表中的活动 -> 对外的当前活动
+ACTIVITY_MAP = {
+    'wakeup': 'morning_routine',
+    'breakfast': 'eating',
+    'commute': 'commuting',
+    'work': 'working',
+    'lunch': 'eating',
+    'off_work': 'transitioning',
+    'dinner': 'eating',
+    'leisure': 'relaxing',
+    'wind_down': 'preparing_bed',
+    'sleep': 'sleeping',
+    'activity': 'engaging',
+    'entertainment': 'enjoying'
+}
+
+# 当前活动的描述
+ACTIVITY_DESCRIPTIONS = {
+    'morning_routine': '正在起床洗漱',
+    'eating': '正在吃饭',
+    'commuting': '正在通勤',
+    'working': '正在工作',
+    'relaxing': '正在休息',
+    'sleeping': '正在睡觉',
+    'celebrating': '正在庆祝',
+    'reflecting': '正在回忆'
+}
+
+# 节日消息，未列出的节日使用 "{节日}快乐！"
+HOLIDAY_MESSAGES = {
+    '春节': "新年快乐！🎉 祝你新的一年心想事成~",
+    '情人节': "情人节快乐！💖 今天有没有什么特别的安排呀？",
+    '中秋节': "中秋节快乐！🌕 记得吃月饼哦~",
+    '圣诞节': "圣诞快乐！🎄 新的一年就要到啦",
+    '生日': "今天是我的生日呢~ 🎂 又长大一岁啦！"
+}
+
+# 基于当前活动的对话话题
+ACTIVITY_TOPICS = {
+    'working': ('工作项目', '同事趣事', '工作挑战'),
+    'relaxing': ('最近看的电影', '听的音乐', '读书心得'),
+    'eating': ('美食推荐', '烹饪心得', '餐厅体验'),
+    'commuting': ('交通状况', '路上见闻', '通勤音乐')
+}
+DEFAULT_TOPICS = ('日常琐事', '心情分享', '未来计划')
 
 class LifeSimulator:
     """生活模拟器 - 模拟AI的日常生活"""
@@ -29,24 +171,55 @@ class LifeSimulator:
         
         # 加载角色配置文件
         self.character_config = self.config.get('character', {})
+        self._base_age = self.character_config.get('character', {}).get('age', 24)
+        
+        # 随机数生成器；每日更新一次取一批随机数，其余概率判断从缓冲中逐个取用
+        self._rng = np.random.default_rng()
+        self._rand_buf = deque()
         
         # 初始化生活状态
         self.life_state = self._initialize_life_state()
         
+        # 状态文件路径只解析一次（目录在加载状态时创建）
+        self._life_dir = Path(self.config.get('env.system.data_path', './data')) / "life"
+        self._state_file = self._life_dir / "life_state.json"
+        
         # 加载保存的状态
         self._load_saved_state()
         
         # 日常活动计划
         self.daily_schedule = self._load_daily_schedule()
+        self._schedule_compiled = self._compile_schedule(self.daily_schedule)
         
         # 特殊日期配置
         self.special_dates = self._load_special_dates()
+        self._compile_time_keys()
+        
+        # 最后更新的日期，用于判断是否进入新的一天（last_updated 字符串只用于保存）
+        self._last_updated_date = date.fromisoformat(self.life_state['last_updated'][:10])
+        
+        # 更新节流：距上次完整更新不足间隔且仍是同一天时直接返回；特殊日期每天只检查一次
+        self.update_interval = 60  # 秒
+        self._next_full_update = 0.0
+        self._special_checked_date = None
+        
+        # 保存节流：状态有变化且距上次保存超过间隔才写文件；
+        # 停用和保存全部状态时由意识核心以 force=True 调用，立即写出
+        self._dirty = False
+        self._last_save_ts = float('-inf')
+        self.save_interval = 30  # 秒
+        
+        # 状态锁：保存可能在线程池中进行，修改状态和序列化保存内容都要持有它
+        self._state_lock = threading.RLock()
         
         # 当前活动
         self.current_activity = None
         self.activity_start_time = None
         self.next_activity_check = None
         
+        # get_status 的结果缓存，相关状态变化时置为 None
+        self._status_cache = None
+        
         self.logger.info("生活模拟器初始化完成")
         self.logger.info(f"当前职业: {self.life_state['occupation']}")
     
@@ -101,8 +274,9 @@ class LifeSimulator:
         }
         
         # 初始化爱好熟练度
-        for hobby in hobby_state['current_hobbies']:
-            hobby_state['hobby_proficiency'][hobby] = random.randint(30, 70)
+        proficiencies = self._rng.integers(30, 71, size=len(hobby_state['current_hobbies'])).tolist()
+        for hobby, proficiency in zip(hobby_state['current_hobbies'], proficiencies):
+            hobby_state['hobby_proficiency'][hobby] = proficiency
             hobby_state['last_practiced'][hobby] = None
         
         # 工作日状态
@@ -130,15 +304,10 @@ class LifeSimulator:
     def _load_saved_state(self):
         """加载保存的状态"""
         try:
-            data_path = Path(self.config.get('env.system.data_path', './data'))
-            life_dir = data_path / "life"
-            life_dir.mkdir(parents=True, exist_ok=True)
-            
-            state_file = life_dir / "life_state.json"
+            self._life_dir.mkdir(parents=True, exist_ok=True)
             
-            if state_file.exists():
-                with open(state_file, 'r', encoding='utf-8') as f:
-                    saved_state = json.load(f)
+            if self._state_file.exists():
+                saved_state = _json_loads(self._state_file.read_bytes())
                 
                 # 合并状态，保留一些动态值
                 for key in ['financial', 'health', 'social', 'hobbies', 'work']:
@@ -190,6 +359,21 @@ class LifeSimulator:
         
         return default_schedule
     
+    def _compile_schedule(self, schedule: Dict[str, List[Dict]]) -> Dict[str, Tuple[List[int], List[str]]]:
+        """
+        将作息表编译为按时间排序的 (分钟数列表, 活动列表)，供二分查找
+        
+        参数:
+            schedule: 作息表，时间格式为 'HH:MM'
+        """
+        compiled = {}
+        for schedule_type, items in schedule.items():
+            entries = [(_hhmm_to_minutes(item['time']), item['activity']) for item in items]
+            entries.sort(key=lambda entry: entry[0])
+            compiled[schedule_type] = ([t for t, _ in entries], [a for _, a in entries])
+        
+        return compiled
+    
     def _load_special_dates(self) -> Dict[str, Dict]:
         """加载特殊日期配置"""
         special_dates_config = self.character_config.get('character', {}).get('special_dates', {})
@@ -228,23 +412,62 @@ class LifeSimulator:
         
         return special_dates
     
-    def update(self, current_time: datetime):
-        """更新生活状态"""
-        # 检查是否需要更新当前活动
-        self._update_current_activity(current_time)
-        
-        # 更新各种状态
-        self._update_time_based_states(current_time)
+    def _compile_time_keys(self):
+        """将作息习惯和特殊日期中的时间字符串预先转换为整数，更新时直接比较整数"""
+        habits = self.life_state['habits']
+        
+        # 提醒时间（分钟数）数组和对应的 (事件类型, 活动, 描述, 数据, 是否仅工作日)，顺序为用餐、上下班、睡觉
+        reminders = []
+        for meal_time in habits['meal_times']:
+            meal_minute = _hhmm_to_minutes(meal_time)
+            meal_name = MEAL_NAMES.get(meal_minute, 'meal')
+            reminders.append((meal_minute, ('meal_time', 'eating', f'现在是{meal_name}时间',
+                                            {'meal_type': meal_name}, False)))
+        work_start, work_end = habits['work_hours']
+        reminders.append((_hhmm_to_minutes(work_start),
+                          ('work_start', 'working', '开始工作啦', {'location': 'office'}, True)))
+        reminders.append((_hhmm_to_minutes(work_end),
+                          ('work_end', 'off_work', '下班时间到', {}, True)))
+        reminders.append((_hhmm_to_minutes(habits['bedtime']),
+                          ('bedtime', 'wind_down', '该准备睡觉啦', {}, False)))
+        
+        self._reminder_times = np.array([t for t, _ in reminders], dtype=np.int16)
+        self._reminder_payloads = [payload for _, payload in reminders]
         
-        # 检查特殊日期
-        self._check_special_dates(current_time)
-        
-        # 更新最后更新时间
-        self.life_state['last_updated'] = current_time.isoformat()
-        
-        # 每天一次的状态更新
-        if self._is_new_day(current_time):
-            self._daily_update(current_time)
+        personal_dates = self.special_dates['personal']
+        self._fixed_dates_by_mmdd = {int(mmdd): info for mmdd, info in self.special_dates['fixed'].items()}
+        self._birthday_mmdd = _mmdd_to_int(personal_dates.get('birthday', {}).get('date'))
+        self._anniversary_mmdd = _mmdd_to_int(personal_dates.get('anniversary', {}).get('date'))
+    
+    def update(self, current_time: datetime):
+        """更新生活状态（频繁调用时按 update_interval 节流）"""
+        now = time.monotonic()
+        today = current_time.date()
+        if now < self._next_full_update and today == self._last_updated_date:
+            return
+        self._next_full_update = now + self.update_interval
+        
+        with self._state_lock:
+            # 检查是否需要更新当前活动
+            self._update_current_activity(current_time)
+            
+            # 更新各种状态
+            self._update_time_based_states(current_time)
+            
+            # 检查特殊日期（每天一次）
+            if self._special_checked_date != today:
+                self._check_special_dates(current_time)
+                self._special_checked_date = today
+            
+            # 更新最后更新时间
+            self.life_state['last_updated'] = current_time.isoformat()
+            
+            # 每天一次的状态更新
+            if self._is_new_day(current_time):
+                self._daily_update(current_time)
+                self._last_updated_date = current_time.date()
+            
+            self._dirty = True
     
     def _update_current_activity(self, current_time: datetime):
         """更新当前活动"""
@@ -255,7 +478,8 @@ class LifeSimulator:
             if new_activity != self.current_activity:
                 self.current_activity = new_activity
                 self.activity_start_time = current_time
-                self.logger.debug(f"活动变更: {self.current_activity}")
+                self._status_cache = None
+                self.logger.debug("活动变更: %s", self.current_activity)
             
             # 设置下次检查时间（30分钟后）
             self.next_activity_check = current_time + timedelta(minutes=30)
@@ -265,18 +489,10 @@ class LifeSimulator:
         is_weekend = current_time.weekday() >= 5  # 5=周六, 6=周日
         schedule_type = 'weekend' if is_weekend else 'weekday'
         
-        current_hour_min = current_time.strftime("%H:%M")
-        
-        # 查找当前时间对应的活动
-        schedule = self.daily_schedule.get(schedule_type, [])
-        
-        for item in schedule:
-            schedule_time = item['time']
-            if current_hour_min >= schedule_time:
-                # 找到最近的时间点
-                activity = item['activity']
-            else:
-                break
+        # 二分查找不晚于当前时间的最近时间点
+        times, activities = self._schedule_compiled.get(schedule_type, ([], []))
+        idx = bisect.bisect_right(times, current_time.hour * 60 + current_time.minute) - 1
+        activity = activities[idx] if idx >= 0 else None
         
         # 如果没有找到，根据时间推测
         if not activity:
@@ -302,97 +518,58 @@ class LifeSimulator:
         return activity
     
     def _update_time_based_states(self, current_time: datetime):
-        """更新时间相关的状态"""
-        hour = current_time.hour
-        is_weekend = current_time.weekday() >= 5
-        
-        # 更新健康状态
+        """更新时间相关的状态（数值计算在 _tick_update 中完成）"""
         health = self.life_state['health']
-        
-        # 夜晚恢复能量
-        if 23 <= hour or hour < 7:
-            health['energy_reserve'] = min(100, health['energy_reserve'] + 0.5)
-        # 白天消耗能量
-        elif 9 <= hour < 18 and not is_weekend:
-            health['energy_reserve'] = max(0, health['energy_reserve'] - 0.3)
-        
-        # 更新社交电量
         social = self.life_state['social']
+        hobbies = self.life_state['hobbies']
+        state = np.array([health['energy_reserve'], social['social_battery'], hobbies['hobby_energy']],
+                         dtype=np.float64)
+        old_energy, old_battery = state[0], state[1]
         
-        # 社交活动消耗社交电量
-        if self.current_activity in ['socializing', 'working']:
-            social['social_battery'] = max(0, social['social_battery'] - 0.2)
-        # 独处时恢复
-        elif self.current_activity in ['leisure', 'sleeping']:
-            social['social_battery'] = min(100, social['social_battery'] + 0.3)
+        activity_id = ACTIVITY_IDS.get(self.current_activity, ACT_OTHER)
+        _tick_update(state, current_time.hour, current_time.weekday() >= 5, activity_id)
         
-        # 更新爱好能量
-        hobbies = self.life_state['hobbies']
+        health['energy_reserve'], social['social_battery'], hobbies['hobby_energy'] = state.tolist()
         
-        # 进行爱好活动时消耗
-        if self.current_activity == 'hobby':
-            hobbies['hobby_energy'] = max(0, hobbies['hobby_energy'] - 0.5)
-        # 其他时间恢复
-        else:
-            hobbies['hobby_energy'] = min(100, hobbies['hobby_energy'] + 0.1)
+        # 状态信息中的精力或社交电量变化时使缓存失效
+        if state[0] != old_energy or state[1] != old_battery:
+            self._status_cache = None
     
     def _check_special_dates(self, current_time: datetime):
         """检查特殊日期"""
-        today_str = current_time.strftime("%m%d")
+        today = current_time.month * 100 + current_time.day
         
         # 检查固定日期节日
-        fixed_dates = self.special_dates['fixed']
-        if today_str in fixed_dates:
-            holiday = fixed_dates[today_str]
+        holiday = self._fixed_dates_by_mmdd.get(today)
+        if holiday:
             self._handle_special_date(current_time, holiday)
         
         # 检查个人重要日期
-        personal_dates = self.special_dates['personal']
-        
         # 生日检查
-        birthday = personal_dates.get('birthday', {})
-        if birthday.get('date') == today_str:
+        if self._birthday_mmdd == today:
             self._handle_birthday(current_time)
         
         # 纪念日检查
-        anniversary = personal_dates.get('anniversary', {})
-        if anniversary.get('date') == today_str:
-            self._handle_anniversary(current_time, anniversary)
+        if self._anniversary_mmdd == today:
+            self._handle_anniversary(current_time, self.special_dates['personal']['anniversary'])
     
     def _handle_special_date(self, current_time: datetime, holiday_info: Dict):
         """处理特殊节日"""
-        holiday_type = holiday_info.get('type', 'holiday')
         holiday_name = holiday_info.get('name', '节日')
         importance = holiday_info.get('importance', 50)
         
-        # 记录节日事件
-        holiday_event = {
-            'type': holiday_type,
-            'name': holiday_name,
-            'date': current_time.strftime("%Y-%m-%d"),
-            'importance': importance,
-            'handled': False
-        }
-        
         # 如果是重要节日，调整活动
         if importance >= 70:
             # 节日当天减少工作，增加休闲
             if self.current_activity == 'working':
                 self.current_activity = 'leisure'
+                self._status_cache = None
                 self.logger.info(f"节日 {holiday_name}，休息一天")
             # 发送节日相关消息
             self._generate_holiday_message(holiday_name, current_time)
     
     def _handle_birthday(self, current_time: datetime):
         """处理生日"""
-        birthday_event = {
-            'type': 'birthday',
-            'date': current_time.strftime("%Y-%m-%d"),
-            'age': self._calculate_virtual_age(),
-            'importance': 95,
-            'celebration_planned': False
-        }
-        
         # 生日当天特殊处理
         self.current_activity = 'celebrating'
         
@@ -400,69 +577,51 @@ class LifeSimulator:
         social = self.life_state['social']
         social['last_social_event'] = current_time.isoformat()
         social['social_circle_size'] = min(50, social['social_circle_size'] + 1)
+        self._status_cache = None
         
-        self.logger.info(f"今天是生日！虚拟年龄: {birthday_event['age']}")
+        self.logger.info(f"今天是生日！虚拟年龄: {self._calculate_virtual_age()}")
     
     def _handle_anniversary(self, current_time: datetime, anniversary_info: Dict):
         """处理纪念日"""
         days_together = anniversary_info.get('days', 0)
         
-        anniversary_event = {
-            'type': 'anniversary',
-            'date': current_time.strftime("%Y-%m-%d"),
-            'days': days_together,
-            'importance': 90,
-            'celebration_planned': False
-        }
-        
         # 纪念日特殊处理
         self.current_activity = 'reflecting'
+        self._status_cache = None
         
         self.logger.info(f"纪念日！在一起 {days_together} 天")
     
     def _generate_holiday_message(self, holiday_name: str, current_time: datetime) -> str:
         """生成节日消息"""
-        messages = {
-            '春节': "新年快乐！🎉 祝你新的一年心想事成~",
-            '情人节': "情人节快乐！💖 今天有没有什么特别的安排呀？",
-            '中秋节': "中秋节快乐！🌕 记得吃月饼哦~",
-            '圣诞节': "圣诞快乐！🎄 新的一年就要到啦",
-            '生日': "今天是我的生日呢~ 🎂 又长大一岁啦！"
-        }
-        
-        return messages.get(holiday_name, f"{holiday_name}快乐！")
+        return HOLIDAY_MESSAGES.get(holiday_name, f"{holiday_name}快乐！")
     
     def _calculate_virtual_age(self) -> int:
-        """计算虚拟年龄"""
-        base_age = self.character_config.get('character', {}).get('age', 24)
-        days_lived = self.life_state['day_in_life']
-        
-        # 每365虚拟天增加1岁
-        age_increase = days_lived // 365
-        
-        return base_age + age_increase
+        """计算虚拟年龄（每365虚拟天增加1岁）"""
+        return self._base_age + self.life_state['day_in_life'] // 365
     
     def _is_new_day(self, current_time: datetime) -> bool:
         """判断是否是新的一天"""
-        last_updated = datetime.fromisoformat(self.life_state['last_updated'])
-        
-        return current_time.date() > last_updated.date()
+        return current_time.date() > self._last_updated_date
     
     def _daily_update(self, current_time: datetime):
         """每日更新"""
         self.life_state['day_in_life'] += 1
         
+        # 当天用到的随机数一次生成：社交 [0:2]，工作 [2:4]，爱好 [4:7]
+        draws = self._rng.random(7).tolist()
+        
         # 更新财务状态（虚拟发薪）
         self._update_financial_state(current_time)
         
         # 更新社交状态
-        self._update_social_state(current_time)
+        self._update_social_state(current_time, draws[0:2])
         
         # 更新工作状态
-        self._update_work_state(current_time)
+        self._update_work_state(current_time, draws[2:4])
         
         # 更新爱好状态
-        self._update_hobby_state(current_time)
+        self._update_hobby_state(current_time, draws[4:7])
+        self._status_cache = None
         
         self.logger.info(f"虚拟生活第 {self.life_state['day_in_life']} 天")
     
@@ -481,81 +640,57 @@ class LifeSimulator:
         daily_expense = financial['monthly_expenses'] / 30
         financial['savings'] = max(0, financial['savings'] - daily_expense)
     
-    def _update_social_state(self, current_time: datetime):
-        """更新社交状态"""
+    def _update_social_state(self, current_time: datetime, draws: List[float]):
+        """更新社交状态（draws 为2个 [0, 1) 随机数）"""
         social = self.life_state['social']
         
         # 恢复社交电量
         social['social_battery'] = min(100, social['social_battery'] + 30)
         
         # 随机社交事件
-        if random.random() < 0.3:  # 30%概率有社交事件
+        if draws[0] < 0.3:  # 30%概率有社交事件
             social['last_social_event'] = current_time.isoformat()
             
             # 可能认识新朋友
-            if random.random() < 0.2:
+            if draws[1] < 0.2:
                 social['social_circle_size'] += 1
     
-    def _update_work_state(self, current_time: datetime):
-        """更新工作状态"""
+    def _update_work_state(self, current_time: datetime, draws: List[float]):
+        """更新工作状态（draws 为2个 [0, 1) 随机数）"""
         work = self.life_state['work']
         
         # 工作日更新工作状态
         if current_time.weekday() < 5:  # 周一到周五
-            # 随机工作事件
-            events = [
-                {'type': 'project_progress', 'change': random.uniform(5, 15)},
-                {'type': 'workload_change', 'change': random.uniform(-10, 10)},
-                {'type': 'productivity_change', 'change': random.uniform(-5, 5)}
-            ]
-            
-            for event in events:
-                if event['type'] == 'project_progress':
-                    # 项目进度
-                    pass
-                elif event['type'] == 'workload_change':
-                    work['workload'] = max(0, min(100, work['workload'] + event['change']))
-                elif event['type'] == 'productivity_change':
-                    work['productivity'] = max(0, min(100, work['productivity'] + event['change']))
-    
-    def _update_hobby_state(self, current_time: datetime):
-        """更新爱好状态"""
+            # 随机工作变化：工作负荷 ±10，生产力 ±5
+            workload_change = draws[0] * 20 - 10
+            productivity_change = draws[1] * 10 - 5
+            work['workload'] = max(0, min(100, work['workload'] + workload_change))
+            work['productivity'] = max(0, min(100, work['productivity'] + productivity_change))
+    
+    def _update_hobby_state(self, current_time: datetime, draws: List[float]):
+        """更新爱好状态（draws 为3个 [0, 1) 随机数）"""
         hobbies = self.life_state['hobbies']
+        current_hobbies = hobbies['current_hobbies']
         
         # 随机练习一个爱好
-        if hobbies['current_hobbies'] and random.random() < 0.4:
-            hobby = random.choice(hobbies['current_hobbies'])
+        if current_hobbies and draws[0] < 0.4:
+            hobby = current_hobbies[int(draws[1] * len(current_hobbies))]
             
             # 提升熟练度
             current_proficiency = hobbies['hobby_proficiency'].get(hobby, 0)
-            improvement = random.uniform(0.1, 0.5)
+            improvement = 0.1 + draws[2] * 0.4
             hobbies['hobby_proficiency'][hobby] = min(100, current_proficiency + improvement)
             
             hobbies['last_practiced'][hobby] = current_time.isoformat()
             
-            self.logger.debug(f"练习爱好: {hobby}，熟练度: {hobbies['hobby_proficiency'][hobby]:.1f}")
+            self.logger.debug("练习爱好: %s，熟练度: %.1f", hobby, hobbies['hobby_proficiency'][hobby])
     
     def get_current_activity(self) -> str:
         """获取当前活动"""
         if not self.current_activity:
             return 'unknown'
         
-        activity_map = {
-            'wakeup': 'morning_routine',
-            'breakfast': 'eating',
-            'commute': 'commuting',
-            'work': 'working',
-            'lunch': 'eating',
-            'off_work': 'transitioning',
-            'dinner': 'eating',
-            'leisure': 'relaxing',
-            'wind_down': 'preparing_bed',
-            'sleep': 'sleeping',
-            'activity': 'engaging',
-            'entertainment': 'enjoying'
-        }
-        
-        return activity_map.get(self.current_activity, self.current_activity)
+        return ACTIVITY_MAP.get(self.current_activity, self.current_activity)
     
     def get_daily_events(self, current_time: datetime) -> List[Dict]:
         """获取当天的日常事件"""
@@ -581,74 +716,27 @@ class LifeSimulator:
     
     def _get_activity_description(self, activity: str) -> str:
         """获取活动描述"""
-        descriptions = {
-            'morning_routine': '正在起床洗漱',
-            'eating': '正在吃饭',
-            'commuting': '正在通勤',
-            'working': '正在工作',
-            'relaxing': '正在休息',
-            'sleeping': '正在睡觉',
-            'celebrating': '正在庆祝',
-            'reflecting': '正在回忆'
-        }
-        
-        return descriptions.get(activity, '正在活动')
+        return ACTIVITY_DESCRIPTIONS.get(activity, '正在活动')
     
     def _get_notify_events(self, current_time: datetime) -> List[Dict]:
         """获取需要通知的事件"""
         events = []
-        hour = current_time.hour
-        
-        # 用餐时间提醒
-        meal_times = self.life_state['habits']['meal_times']
-        current_hour_min = current_time.strftime("%H:%M")
-        
-        for meal_time in meal_times:
-            if current_hour_min == meal_time:
-                meal_name = {
-                    '08:00': 'breakfast',
-                    '12:30': 'lunch',
-                    '19:00': 'dinner'
-                }.get(meal_time, 'meal')
-                
-                events.append({
-                    'type': 'meal_time',
-                    'activity': 'eating',
-                    'description': f'现在是{meal_name}时间',
-                    'should_notify': True,
-                    'data': {'meal_type': meal_name}
-                })
-        
-        # 工作时间提醒
-        if not current_time.weekday() >= 5:  # 工作日
-            work_hours = self.life_state['habits']['work_hours']
+        minute = current_time.hour * 60 + current_time.minute
+        
+        # 一次比较找出所有到点的提醒，只为命中的提醒构造事件
+        for idx in np.flatnonzero(self._reminder_times == minute):
+            event_type, activity, description, data, workday_only = self._reminder_payloads[idx]
+            
+            # 工作时间提醒只在工作日发出
+            if workday_only and current_time.weekday() >= 5:
+                continue
             
-            if current_hour_min == work_hours[0]:
-                events.append({
-                    'type': 'work_start',
-                    'activity': 'working',
-                    'description': '开始工作啦',
-                    'should_notify': True,
-                    'data': {'location': 'office'}
-                })
-            elif current_hour_min == work_hours[1]:
-                events.append({
-                    'type': 'work_end',
-                    'activity': 'off_work',
-                    'description': '下班时间到',
-                    'should_notify': True,
-                    'data': {}
-                })
-        
-        # 睡觉时间提醒
-        bedtime = self.life_state['habits']['bedtime']
-        if current_hour_min == bedtime:
             events.append({
-                'type': 'bedtime',
-                'activity': 'wind_down',
-                'description': '该准备睡觉啦',
+                'type': event_type,
+                'activity': activity,
+                'description': description,
                 'should_notify': True,
-                'data': {}
+                'data': dict(data)
             })
         
         return events
@@ -656,12 +744,11 @@ class LifeSimulator:
     def check_special_dates(self, current_time: datetime) -> List[Dict]:
         """检查特殊日期并返回事件"""
         events = []
-        today_str = current_time.strftime("%m%d")
+        today = current_time.month * 100 + current_time.day
         
         # 检查固定节日
-        fixed_dates = self.special_dates['fixed']
-        if today_str in fixed_dates:
-            holiday = fixed_dates[today_str]
+        holiday = self._fixed_dates_by_mmdd.get(today)
+        if holiday:
             events.append({
                 'type': 'holiday',
                 'description': f"今天是{holiday['name']}",
@@ -671,7 +758,7 @@ class LifeSimulator:
         
         # 检查生日
         birthday = self.special_dates['personal'].get('birthday', {})
-        if birthday.get('date') == today_str:
+        if self._birthday_mmdd == today:
             events.append({
                 'type': 'birthday',
                 'description': '今天是我的生日！',
@@ -686,9 +773,7 @@ class LifeSimulator:
         current_activity = self.get_current_activity()
         
         # 不适合主动发起对话的活动
-        busy_activities = ['working', 'sleeping', 'commuting', 'eating']
-        
-        if current_activity in busy_activities:
+        if current_activity in BUSY_ACTIVITIES:
             return False
         
         # 检查社交电量
@@ -702,32 +787,34 @@ class LifeSimulator:
             return False
         
         # 随机因素
-        return random.random() < 0.3  # 30%概率
+        return self._rand() < 0.3  # 30%概率
     
     def generate_conversation_topic(self) -> str:
         """生成对话话题"""
         current_activity = self.get_current_activity()
         
         # 基于当前活动的话题
-        activity_topics = {
-            'working': ['工作项目', '同事趣事', '工作挑战'],
-            'relaxing': ['最近看的电影', '听的音乐', '读书心得'],
-            'eating': ['美食推荐', '烹饪心得', '餐厅体验'],
-            'commuting': ['交通状况', '路上见闻', '通勤音乐']
-        }
-        
-        topics = activity_topics.get(current_activity, ['日常琐事', '心情分享', '未来计划'])
+        topics = ACTIVITY_TOPICS.get(current_activity, DEFAULT_TOPICS)
         
         # 添加爱好相关话题
         hobbies = self.life_state['hobbies']['current_hobbies']
         if hobbies:
-            topics.extend([f'{hobby}相关' for hobby in hobbies[:2]])
+            topics = topics + tuple(f'{hobby}相关' for hobby in hobbies[:2])
         
-        return random.choice(topics)
+        return topics[int(self._rand() * len(topics))]
+    
+    def _rand(self) -> float:
+        """取一个 [0, 1) 随机数，缓冲用完时一次补充256个"""
+        if not self._rand_buf:
+            self._rand_buf.extend(self._rng.random(256).tolist())
+        return self._rand_buf.popleft()
     
     def get_status(self) -> Dict[str, Any]:
-        """获取状态信息"""
-        return {
+        """获取状态信息（相关状态未变化时复用缓存，返回其浅拷贝）"""
+        if self._status_cache is not None:
+            return self._status_cache.copy()
+        
+        self._status_cache = {
             'current_activity': self.get_current_activity(),
             'occupation': self.life_state['occupation'],
             'day_in_life': self.life_state['day_in_life'],
@@ -745,20 +832,27 @@ class LifeSimulator:
                 'productivity': self.life_state['work']['productivity']
             }
         }
+        
+        return self._status_cache.copy()
     
-    def save_state(self):
-        """保存生活状态"""
+    def save_state(self, force: bool = False):
+        """保存生活状态；没有变化或未到保存间隔时跳过，force 为 True 时立即保存"""
+        if not force and (not self._dirty or time.monotonic() - self._last_save_ts < self.save_interval):
+            return
+        
         try:
-            data_path = Path(self.config.get('env.system.data_path', './data'))
-            life_dir = data_path / "life"
-            life_dir.mkdir(parents=True, exist_ok=True)
+            # 先写临时文件再替换，写入中途出错不会损坏原文件
+            with self._state_lock:
+                payload = _json_bytes(self.life_state)
+                self._dirty = False
             
-            # 保存当前状态
-            state_file = life_dir / "life_state.json"
-            with open(state_file, 'w', encoding='utf-8') as f:
-                json.dump(self.life_state, f, ensure_ascii=False, indent=2)
+            tmp_path = self._state_file.with_name("life_state.json.tmp")
+            tmp_path.write_bytes(payload)
+            os.replace(tmp_path, self._state_file)
             
+            self._last_save_ts = time.monotonic()
             self.logger.debug("生活状态已保存")
             
         except Exception as e:
+            self._dirty = True
             self.logger.error(f"保存生活状态失败: {e}")
\ No newline at end of file
@@ -296,6 +296,44 @@ class MemorySystem:
         """记录交互（接收/发送消息）"""
         return self.record_event(f'interaction_{interaction_type}', data)
     
+    def record_interactions_batch(self, interactions: List[Tuple[str, Dict[str, Any]]]):
+        """
+        批量记录交互，一次提交写入
+        
+        参数:
+            interactions: (交互类型, 交互数据) 列表，格式同 record_interaction
+        """
+        if not interactions:
+            return
+        
+        try:
+            conn, cursor = self._get_db_connection()
+            
+            recorded_at = datetime.now().isoformat()
+            cursor.executemany('''
+                INSERT INTO memories 
+                (memory_type, content, metadata, importance)
+                VALUES (?, ?, ?, ?)
+            ''', [
+                (
+                    'event',
+                    json.dumps(data, ensure_ascii=False),
+                    json.dumps({
+                        'event_type': f'interaction_{interaction_type}',
+                        'recorded_at': recorded_at
+                    }, ensure_ascii=False),
+                    data.get('importance', 50)
+                )
+                for interaction_type, data in interactions
+            ])
+            
+            conn.commit()
+            
+            self.logger.debug(f"批量记录交互: {len(interactions)} 条")
+            
+        except Exception as e:
+            self.logger.error(f"批量记录交互失败: {e}")
+    
     def _calculate_conversation_importance(self, user_message: str, 
                                          ai_response: str, 
                                          context: Dict) -> int:
@@ -553,58 +591,58 @@ class MemorySystem:
             self.logger.error(f"获取最后互动时间失败: {e}")
             return None
     
-def consolidate_memories(self):
-    """整理记忆（清理、归档、提升重要性等）- 兼容SQLite版本"""
-    try:
-        conn, cursor = self._get_db_connection()
-        
-        # 1. 清理过期记忆
-        cursor.execute('''
-            DELETE FROM memories 
-            WHERE expiration_date IS NOT NULL 
-            AND expiration_date < CURRENT_TIMESTAMP
-        ''')
-        
-        deleted_count = cursor.rowcount
-        if deleted_count > 0:
-            self.logger.info(f"清理了 {deleted_count} 条过期记忆")
-        
-        # 2. 提升频繁访问记忆的重要性（使用CASE替代LEAST）
-        cursor.execute('''
-            UPDATE memories 
-            SET importance = CASE 
-                WHEN importance + 5 > 100 THEN 100 
-                ELSE importance + 5 
-            END
-            WHERE accessed_count >= 10 
-            AND importance < 90
-        ''')
-        
-        updated_count = cursor.rowcount
-        if updated_count > 0:
-            self.logger.info(f"提升了 {updated_count} 条记忆的重要性")
-        
-        # 3. 降低长期未访问记忆的重要性（使用CASE替代GREATEST）
-        cursor.execute('''
-            UPDATE memories 
-            SET importance = CASE 
-                WHEN importance - 2 < 1 THEN 1 
-                ELSE importance - 2 
-            END
-            WHERE last_accessed IS NOT NULL 
-            AND julianday('now') - julianday(last_accessed) > 30 
-            AND importance > 20
-        ''')
-        
-        conn.commit()
-        
-        # 4. 重新加载缓存
-        self.load_existing_memories()
-        
-        self.logger.info("记忆整理完成")
-        
-    except Exception as e:
-        self.logger.error(f"记忆整理失败: {e}")
+    def consolidate_memories(self):
+        """整理记忆（清理、归档、提升重要性等）- 兼容SQLite版本"""
+        try:
+            conn, cursor = self._get_db_connection()
+            
+            # 1. 清理过期记忆
+            cursor.execute('''
+                DELETE FROM memories 
+                WHERE expiration_date IS NOT NULL 
+                AND expiration_date < CURRENT_TIMESTAMP
+            ''')
+            
+            deleted_count = cursor.rowcount
+            if deleted_count > 0:
+                self.logger.info(f"清理了 {deleted_count} 条过期记忆")
+            
+            # 2. 提升频繁访问记忆的重要性（使用CASE替代LEAST）
+            cursor.execute('''
+                UPDATE memories 
+                SET importance = CASE 
+                    WHEN importance + 5 > 100 THEN 100 
+                    ELSE importance + 5 
+                END
+                WHERE accessed_count >= 10 
+                AND importance < 90
+            ''')
+            
+            updated_count = cursor.rowcount
+            if updated_count > 0:
+                self.logger.info(f"提升了 {updated_count} 条记忆的重要性")
+            
+            # 3. 降低长期未访问记忆的重要性（使用CASE替代GREATEST）
+            cursor.execute('''
+                UPDATE memories 
+                SET importance = CASE 
+                    WHEN importance - 2 < 1 THEN 1 
+                    ELSE importance - 2 
+                END
+                WHERE last_accessed IS NOT NULL 
+                AND julianday('now') - julianday(last_accessed) > 30 
+                AND importance > 20
+            ''')
+            
+            conn.commit()
+            
+            # 4. 重新加载缓存
+            self.load_existing_memories()
+            
+            self.logger.info("记忆整理完成")
+            
+        except Exception as e:
+            self.logger.error(f"记忆整理失败: {e}")
     
     def get_stats(self) -> Dict[str, Any]:
         """获取统计信息"""
@@ -640,8 +678,8 @@ def consolidate_memories(self):
             self.logger.error(f"获取统计失败: {e}")
             return {}
     
-    def save_state(self):
-        """保存状态"""
+    def save_state(self, force: bool = False):
+        """保存状态（force 仅为与其他子系统接口一致）"""
         # 数据库已经自动保存，这里只需记录日志
         self.logger.info("记忆系统状态已保存")
     
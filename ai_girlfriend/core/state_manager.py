@@ -233,38 +233,63 @@ class StateManager:
             except Exception as e:
                 self.logger.error(f"保存状态失败: {e}")
     
+    def save_batch(self, states: Dict[str, Dict[str, Any]]):
+        """批量保存多个状态类别（合并为一次数据库提交）"""
+        with self.state_lock:
+            try:
+                for category, data in states.items():
+                    if category in self.system_state:
+                        self.system_state[category].update(data)
+                    else:
+                        self.system_state[category] = data
+                    self._write_state_row(category, data)
+                
+                self.conn.commit()
+                
+                # 定期保存到文件
+                self._check_auto_save()
+                
+                self.logger.debug(f"状态已批量保存: {', '.join(states)}")
+                
+            except Exception as e:
+                self.logger.error(f"批量保存状态失败: {e}")
+                self.conn.rollback()
+    
     def _save_to_database(self, category: str, data: Dict[str, Any]):
         """保存到数据库"""
         try:
-            # 将数据转换为JSON
-            json_data = json.dumps(data, ensure_ascii=False)
-            
-            # 检查是否已存在
-            self.cursor.execute(
-                'SELECT key FROM system_state WHERE key = ?',
-                (category,)
-            )
-            
-            if self.cursor.fetchone():
-                # 更新现有记录
-                self.cursor.execute('''
-                    UPDATE system_state 
-                    SET value = ?, data_type = 'json', updated_at = CURRENT_TIMESTAMP
-                    WHERE key = ?
-                ''', (json_data, category))
-            else:
-                # 插入新记录
-                self.cursor.execute('''
-                    INSERT INTO system_state (key, value, data_type)
-                    VALUES (?, ?, 'json')
-                ''', (category, json_data))
-            
+            self._write_state_row(category, data)
             self.conn.commit()
             
         except Exception as e:
             self.logger.error(f"保存到数据库失败: {e}")
             self.conn.rollback()
     
+    def _write_state_row(self, category: str, data: Dict[str, Any]):
+        """写入一条状态记录（不提交事务）"""
+        # 将数据转换为JSON
+        json_data = json.dumps(data, ensure_ascii=False)
+        
+        # 检查是否已存在
+        self.cursor.execute(
+            'SELECT key FROM system_state WHERE key = ?',
+            (category,)
+        )
+        
+        if self.cursor.fetchone():
+            # 更新现有记录
+            self.cursor.execute('''
+                UPDATE system_state 
+                SET value = ?, data_type = 'json', updated_at = CURRENT_TIMESTAMP
+                WHERE key = ?
+            ''', (json_data, category))
+        else:
+            # 插入新记录
+            self.cursor.execute('''
+                INSERT INTO system_state (key, value, data_type)
+                VALUES (?, ?, 'json')
+            ''', (category, json_data))
+    
     def _check_auto_save(self):
         """检查是否需要自动保存"""
         current_time = datetime.now()
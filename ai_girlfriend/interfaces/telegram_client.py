@@ -6,6 +6,7 @@
 """
 
 import asyncio
+import contextlib
 import logging
 import tempfile
 import random
@@ -519,10 +520,14 @@ class TelegramClient:
         ]
         
         await application.bot.set_my_commands(commands)
+        
+        # 在机器人的事件循环上定期保存对话历史
+        self.consciousness.communication.start_autosave()
         self.logger.info("Telegram机器人已启动，等待消息...")
     
     async def _post_shutdown(self, application: Application):
         """关闭后处理"""
+        await self.consciousness.communication.aclose()
         self.logger.info("Telegram机器人已关闭")
     
     async def _handle_start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -628,7 +633,7 @@ class TelegramClient:
                     full_message = f"用户发送了一张图片。\n\n图片内容分析结果：{analysis_result['description']}"
                 
                 # 调用AI生成回复（这里调用你原有的AI系统）
-                result = self.consciousness.process_user_message(
+                result = await self.consciousness.process_user_message(
                     user_id=str(user.id),
                     message=full_message,
                     message_type='image',
@@ -740,35 +745,26 @@ class TelegramClient:
         await asyncio.sleep(min(5, delay_seconds))
         
         try:
-            # 处理消息
-            result = self.consciousness.process_user_message(
+            # 流式处理消息，每生成一段就发送一段，不必等完整回复
+            # 发送出错时立即关闭生成器，不把流留到垃圾回收时才结束
+            sent = 0
+            async with contextlib.aclosing(self.consciousness.stream_user_message(
                 user_id=str(user.id),
                 message=message_text,
                 message_type='text',
                 attachments=[]
-            )
-            
-            response = result.get('response', '')
-            
-            # 发送响应
-            if isinstance(response, dict) and response.get('segmented'):
-                # 分段发送
-                segments = response.get('segments', [])
-                delay = response.get('delay_between', 1.5)
-                
-                for i, segment in enumerate(segments):
-                    if i > 0:
-                        await asyncio.sleep(delay)
-                    await update.message.reply_text(segment)
-            else:
-                # 使用消息拆分器发送
-                response_text = str(response)
-                
-                # 超过50字才拆分
-                if len(response_text) > 50:
-                    await self._send_split_message(update, response_text)
-                else:
-                    await update.message.reply_text(response_text)
+            )) as segments:
+                async for segment in segments:
+                    if sent:
+                        await asyncio.sleep(1.5)
+                        await context.bot.send_chat_action(chat_id=chat_id, action="typing")
+                    
+                    # 超过50字才拆分
+                    if len(segment) > 50:
+                        await self._send_split_message(update, segment)
+                    else:
+                        await update.message.reply_text(segment)
+                    sent += 1
             
         except Exception as e:
             self.logger.error(f"处理消息失败: {e}")
@@ -19,14 +19,14 @@ sys.path.insert(0, str(project_root))
 from core.consciousness import ConsciousnessCore
 from interfaces.telegram_client import TelegramClient
 from utils.file_manager import FileManager
-from config_manager import ConfigManager
+from config_manager import get_config
 
 class AIGirlfriendLauncher:
     """AI女友启动器"""
     
     def __init__(self):
         self.setup_logging()
-        self.config = ConfigManager()
+        self.config = None
         self.file_manager = FileManager()
         
     def setup_logging(self):
@@ -55,7 +55,7 @@ class AIGirlfriendLauncher:
         """初始化系统组件"""
         try:
             self.logger.info("步骤1/4: 加载配置文件...")
-            self.config.load_all_configs()
+            self.config = get_config()
             
             self.logger.info("步骤2/4: 初始化文件系统...")
             self.file_manager.initialize_data_structure()
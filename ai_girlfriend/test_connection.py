@@ -9,7 +9,7 @@ import requests
 import sys
 import os
 from pathlib import Path
-from dotenv import load_dotenv
+from config_manager import load_env_file
 
 def test_telegram_connection(token):
     """测试Telegram连接"""
@@ -146,7 +146,7 @@ def main():
     # 加载环境变量
     env_path = Path(__file__).parent / ".env"
     if env_path.exists():
-        load_dotenv(env_path)
+        load_env_file(env_path)
     else:
         print("❌ 未找到 .env 文件")
         return
@@ -18,7 +18,7 @@ def test_basic():
     
     # 检查必要模块
     required_modules = [
-        'telegram', 'requests', 'yaml', 'aiohttp', 'dotenv'
+        'telegram', 'requests', 'yaml', 'aiohttp'
     ]
     
     print("\n检查依赖模块:")